@@ -0,0 +1,228 @@
+"""
+Headless JSON API for the idea pipeline.
+
+Exposes the same utils the Streamlit app uses, without its per-interaction
+script reruns. Blocking work (OpenAI, embeddings, SQLite) runs in the
+thread pool so the event loop keeps accepting requests.
+
+Run with:
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 2
+
+Authenticate with `Authorization: Bearer <key>` or `X-API-Key: <key>`;
+keys are created from the app sidebar and share the account's credits.
+"""
+import json
+from contextlib import asynccontextmanager
+
+import anyio
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import utils.auth as auth
+from utils.cache import get_or_create_artifact, idea_key
+from utils.docs_generator import generate_project_docs
+from utils.resource_finder import find_relevant_resources
+from utils.retriever import get_warm_index, namespace_for, retrieve_relevant_topics
+from utils.scheduler import set_caller, get_scheduler
+from utils.summarizer import summarize_text
+from utils.topic_generator import generate_hackathon_ideas, parse_ideas
+
+MAX_TEXT_CHARS = 200000
+MAX_TOP_K = 20
+
+
+def _is_error(text):
+    return isinstance(text, str) and text.startswith(("❌", "⚠️"))
+
+
+def _error_status(text):
+    # Shed by the scheduler / missing key -> retry later; anything else is an upstream failure
+    return 503 if text.startswith("⚠️") else 502
+
+
+async def authenticate(request):
+    """Resolves the API key to its user and tags LLM calls with that user."""
+    api_key = request.headers.get("x-api-key")
+    authorization = request.headers.get("authorization", "")
+    if not api_key and authorization.lower().startswith("bearer "):
+        api_key = authorization[7:].strip()
+    user = await run_in_threadpool(auth.get_user_by_api_key, api_key)
+    if user is None:
+        raise HTTPException(401, "Missing or invalid API key.")
+    set_caller(user["username"], user["is_admin"])
+    return user
+
+
+async def read_json(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Request body must be JSON.")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Request body must be a JSON object.")
+    return body
+
+
+def require_text(body, field):
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPException(400, f"'{field}' is required.")
+    if len(value) > MAX_TEXT_CHARS:
+        raise HTTPException(413, f"'{field}' is longer than {MAX_TEXT_CHARS} characters.")
+    return value
+
+
+def resolve_namespace(body, user):
+    """The caller's private topics by default, or a shared event code; never another user's private ones."""
+    namespace = body.get("namespace")
+    if namespace is not None and not isinstance(namespace, str):
+        raise HTTPException(400, "'namespace' must be a string.")
+    namespace = namespace_for(user["username"], namespace)
+    if namespace is None:
+        raise HTTPException(403, "That namespace belongs to another user.")
+    return namespace
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "scheduler": get_scheduler().stats()})
+
+
+async def summarize(request):
+    await authenticate(request)
+    body = await read_json(request)
+    summary = await run_in_threadpool(summarize_text, require_text(body, "text"))
+    if _is_error(summary):
+        return JSONResponse({"error": summary}, status_code=_error_status(summary))
+    return JSONResponse({"summary": summary})
+
+
+async def retrieve(request):
+    user = await authenticate(request)
+    body = await read_json(request)
+    query = require_text(body, "query")
+    namespace = resolve_namespace(body, user)
+    try:
+        top_k = max(1, min(int(body.get("top_k", 5)), MAX_TOP_K))
+    except (TypeError, ValueError):
+        raise HTTPException(400, "'top_k' must be an integer.")
+    topics = await run_in_threadpool(retrieve_relevant_topics, query, namespace, top_k)
+    return JSONResponse({"topics": topics})
+
+
+def _idea_stages(text, namespace):
+    """Yields (event, payload) for each pipeline stage; blocking, so run stage by stage off-loop."""
+    summary = summarize_text(text)
+    if _is_error(summary):
+        yield "error", {"error": summary, "status": _error_status(summary)}
+        return
+    yield "summary", {"summary": summary}
+
+    topics = retrieve_relevant_topics(summary, namespace=namespace)
+    yield "topics", {"topics": topics}
+
+    resources = find_relevant_resources(summary)
+    ideas = generate_hackathon_ideas(summary, topics, resources)
+    if _is_error(ideas):
+        yield "error", {"error": ideas, "status": _error_status(ideas)}
+        return
+    yield "ideas", {"markdown": ideas, "ideas": parse_ideas(ideas)}
+
+
+async def _run_stages(text, namespace, user):
+    """
+    Async iterator over _idea_stages. The credit is refunded unless the ideas
+    are delivered: on an error event, an exception, or the client going away.
+    """
+    set_caller(user["username"], user["is_admin"])
+    stages = _idea_stages(text, namespace)
+    done = object()
+    refund_due = not user["is_admin"]
+    try:
+        while True:
+            item = await run_in_threadpool(next, stages, done)
+            if item is done:
+                return
+            event, payload = item
+            if event == "error" and refund_due:
+                # Refund before yielding: the JSON caller stops reading at the error
+                refund_due = False
+                await run_in_threadpool(auth.refund_credit, user["username"])
+            yield event, payload
+            if event == "ideas":
+                # Writes to a closed connection are dropped silently; a disconnect surfaces here instead
+                await anyio.lowlevel.checkpoint()
+                refund_due = False
+    finally:
+        if refund_due:
+            # Still runs when the request is cancelled by a disconnect
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(auth.refund_credit, user["username"])
+
+
+async def ideas(request):
+    """
+    Summarize -> retrieve -> generate, for one credit. With "stream": true the
+    response is NDJSON, one {"event": ..., ...} line per stage as it finishes.
+    """
+    user = await authenticate(request)
+    body = await read_json(request)
+    text = require_text(body, "text")
+    namespace = resolve_namespace(body, user)
+
+    if not user["is_admin"] and not await run_in_threadpool(auth.consume_credit, user["username"]):
+        raise HTTPException(402, "No credits left on this account.")
+
+    if body.get("stream"):
+        async def ndjson():
+            async for event, payload in _run_stages(text, namespace, user):
+                yield json.dumps({"event": event, **payload}, ensure_ascii=False) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    result = {}
+    async for event, payload in _run_stages(text, namespace, user):
+        if event == "error":
+            return JSONResponse({"error": payload["error"]}, status_code=payload["status"])
+        result.update(payload)
+    return JSONResponse(result)
+
+
+async def docs(request):
+    await authenticate(request)
+    body = await read_json(request)
+    idea = body.get("idea")
+    if not isinstance(idea, dict) or not isinstance(idea.get("title"), str) or not idea["title"].strip():
+        raise HTTPException(400, "'idea' must be an object with a 'title'.")
+    idea = {"title": idea["title"], "summary": str(idea.get("summary", "")), "tech_stack": str(idea.get("tech_stack", ""))}
+
+    text, cached = await run_in_threadpool(
+        get_or_create_artifact, idea_key(idea, kind="docs"), "docs",
+        lambda: generate_project_docs(idea), lambda value: not _is_error(value)
+    )
+    if _is_error(text):
+        return JSONResponse({"error": text}, status_code=_error_status(text))
+    return JSONResponse({"docs": text, "cached": cached})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Open the prebuilt topics index before serving, so no request pays for it
+    await run_in_threadpool(get_warm_index)
+    yield
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+routes = [
+    Route("/health", health, methods=["GET"]),
+    Route("/v1/summarize", summarize, methods=["POST"]),
+    Route("/v1/retrieve", retrieve, methods=["POST"]),
+    Route("/v1/ideas", ideas, methods=["POST"]),
+    Route("/v1/docs", docs, methods=["POST"]),
+]
+
+app = Starlette(routes=routes, exception_handlers={HTTPException: http_error}, lifespan=lifespan)
@@ -13,38 +13,37 @@ os.environ['TEMP'] = tempfile.gettempdir()
 os.environ['TMP'] = tempfile.gettempdir()
 
 import streamlit as st
-import re
-import requests
 import tempfile
-from openai import OpenAI
+import time
 from utils.summarizer import summarize_text
-from utils.retriever import create_vector_db, retrieve_relevant_topics
+from utils.retriever import (
+    create_vector_db, delete_vector_db, retrieve_relevant_topics, collection_name_for, get_warm_index, namespace_for,
+    user_namespace
+)
 from utils.resource_finder import find_relevant_resources
-from utils.topic_generator import generate_hackathon_ideas
+from utils.topic_generator import generate_hackathon_ideas, parse_ideas
+from utils.keywords import extract_keywords
+from utils.github_search import search_github_repos
+from utils.docs_generator import generate_project_docs
+from utils.cache import idea_key, get_artifact, put_artifact, session_artifacts
+from utils.ingest import save_upload
+from utils.ppt_generator import build_deck, build_deck_zip, PPTX_MIME
+from utils.scheduler import set_caller, queue_feedback
+from utils.usage import usage_summary
 import utils.auth as auth
 
 import os
 
 import os
 
-# Helper to safely get OpenAI client
-def get_openai_client():
-    try:
-        api_key = st.secrets["openai_api_key"]
-    except:
-        api_key = os.environ.get("OPENAI_API_KEY")
-    
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
-
-client = get_openai_client()
-
 # Constants
 USAGE_LIMIT = 2
 
 st.set_page_config(page_title="Hackathon Idea Generator", page_icon="🚀", layout="wide")
 
+# Open the prebuilt topics index once per process, before the first search needs it
+get_warm_index()
+
 # Custom CSS
 st.markdown("""
     <style>
@@ -94,19 +93,31 @@ def show_login_page():
                     else:
                         st.error(msg)
 
-# --- Main App Logic ---
-if st.session_state["user"] is None:
-    show_login_page()
-else:
-    # User is logged in
-    user = st.session_state["user"]
-    username = user["username"]
-    
-    # Refresh credits from DB to ensure accuracy
-    current_credits = auth.get_credits(username)
-    is_admin = user["is_admin"]
+def queue_notice(placeholder):
+    """Shows the user's place in the shared LLM queue while they wait for a slot."""
+    def update(position):
+        if position:
+            placeholder.info(f"⏳ High demand right now - you're #{position} in line for the AI service...")
+        else:
+            placeholder.empty()
+    return update
 
-    # --- Header & Credits ---
+def identify_caller():
+    """
+    Attributes this run's LLM calls to the logged-in user. Fragment reruns
+    run on a fresh thread without the full run's context, so fragments that
+    can reach the LLM call this themselves.
+    """
+    user = st.session_state.get("user")
+    if user:
+        set_caller(user["username"], user["is_admin"])
+
+# --- Page sections ---
+# Each fragment reruns on its own when one of its widgets is used, so e.g. a
+# content button only redoes that idea instead of the whole script.
+
+@st.fragment
+def header_fragment(username, is_admin):
     col_header, col_credits = st.columns([3, 1])
     
     with col_header:
@@ -121,72 +132,244 @@ else:
                 st.rerun()
         with col_metric:
             if not is_admin:
+                # Refresh credits from DB to ensure accuracy
+                current_credits = auth.get_credits(username)
                 st.metric("Credits Left", f"{current_credits}/{USAGE_LIMIT}", 
                          delta="Trial" if current_credits > 0 else "Empty",
                          delta_color="normal" if current_credits > 0 else "off")
 
-    st.markdown("Generate innovative project ideas using your hackathon description and uploaded topics!")
+@st.fragment
+def usage_fragment():
+    with st.expander("📊 Usage & Cost (admin)", expanded=False):
+        window = st.selectbox("Window", ["Last 24 hours", "Last 7 days", "All time"], key="usage_window")
+        since = {"Last 24 hours": time.time() - 86400, "Last 7 days": time.time() - 7 * 86400}.get(window)
+        by_stage = usage_summary(since, group_by="stage")
+        if not by_stage:
+            st.info("No usage recorded yet.")
+        else:
+            requests_total = sum(r["requests"] for r in by_stage)
+            hits_total = sum(r["cache_hits"] for r in by_stage)
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Requests", requests_total)
+            m2.metric("Cache / coalesced hits", f"{hits_total / requests_total:.0%}")
+            m3.metric("Tokens", f"{sum(r['prompt_tokens'] + r['completion_tokens'] for r in by_stage):,}")
+            m4.metric("Est. cost", f"${sum(r['est_cost_usd'] for r in by_stage):.2f}")
+            st.markdown("**By stage & model**")
+            st.dataframe(by_stage, use_container_width=True, hide_index=True)
+            st.markdown("**By user**")
+            st.dataframe(usage_summary(since, group_by="user"), use_container_width=True, hide_index=True)
+
+def save_topics_upload(uploaded_file, topics_namespace, username, is_admin):
+    """
+    Saves the upload under data/<collection>/, skipping the write when the same content is already there.
+    Claims the namespace for `username` on a new upload; returns None if someone else owns it.
+    """
+    topics_dir = os.path.join("data", collection_name_for(topics_namespace))
+    topics_ext = os.path.splitext(uploaded_file.name)[1].lower()
+    topics_path = os.path.join(topics_dir, f"topics{topics_ext}")
     
-    # --- Sidebar ---
-    st.sidebar.header("📄 Upload Your Topics File (.docx)")
-    st.sidebar.markdown("Upload a DOCX file containing relevant topics, technologies, or domain knowledge.")
+    # Same upload widget state as last rerun: nothing to hash or write
+    saved = st.session_state.setdefault("saved_uploads", {})
+    if saved.get(topics_path) == uploaded_file.file_id:
+        return topics_path
+    if not auth.claim_namespace(topics_namespace, username) and not is_admin:
+        return None
+    save_upload(uploaded_file.getvalue(), topics_path)
+    saved[topics_path] = uploaded_file.file_id
+    return topics_path
+
+@st.fragment
+def topics_sidebar_fragment(topics_namespace, username, is_admin):
+    st.header("📄 Upload Your Topics File (.docx / .pdf)")
+    
+    # Only whoever first uploaded to an event (or an admin) may replace or clear its topics
+    owner = auth.namespace_owner(topics_namespace)
+    if owner not in (None, username) and not is_admin:
+        st.info(f"🔒 This event's topics are managed by **{owner}**. Ideas you generate still use them.")
+        return
     
-    uploaded_file = st.sidebar.file_uploader("Upload DOCX", type=["docx"])
+    st.markdown("Upload a DOCX or PDF file containing relevant topics, technologies, or domain knowledge.")
+    
+    uploaded_file = st.file_uploader("Upload DOCX or PDF", type=["docx", "pdf"])
     
     if uploaded_file:
-        import os
-        import shutil
-        os.makedirs("data", exist_ok=True)
+        topics_path = save_topics_upload(uploaded_file, topics_namespace, username, is_admin)
+        if topics_path is None:
+            st.error("🚫 Another organiser just claimed this event code. Pick a different one.")
+            return
+        st.success("✅ Topics file uploaded!")
         
-        with open("data/topics.docx", "wb") as f:
-            f.write(uploaded_file.read())
-        st.sidebar.success("✅ Topics file uploaded!")
+        if st.button("🗑️ Clear Old Vector DB"):
+            if delete_vector_db(topics_namespace):
+                st.success("✅ Old vector database cleared!")
+            else:
+                st.info("ℹ️ No existing database found")
+    
+        if st.button("🔄 Create Vector DB"):
+            with st.spinner("Creating vector database..."):
+                if create_vector_db(topics_path, namespace=topics_namespace) is not None:
+                    st.success("✅ Vector DB created successfully!")
+
+@st.fragment
+def api_access_fragment(username):
+    with st.expander("🔑 API Access"):
+        st.caption("Call the idea pipeline from other services (see the README). Idea generation uses this account's credits.")
+        if st.button("Create API key", key="create_api_key"):
+            st.session_state["new_api_key"] = auth.create_api_key(username, label="sidebar")
+        if st.session_state.get("new_api_key"):
+            st.code(st.session_state["new_api_key"], language=None)
+            st.caption("Copy it now - it won't be shown again.")
+        active_keys = auth.count_api_keys(username)
+        if active_keys and st.button(f"Revoke {active_keys} active key(s)", key="revoke_api_keys"):
+            auth.revoke_api_keys(username)
+            st.session_state.pop("new_api_key", None)
+            st.rerun(scope="fragment")
+
+def render_idea_content(idea, bundle, i):
+    """Render cached or freshly generated content for one idea (no API calls)."""
+    st.info(f"🔑 Keywords: {bundle['keywords']}")
+    
+    if bundle["github"]:
+        st.markdown("#### 🔗 GitHub Repositories:")
+        for r in bundle["github"]:
+            st.markdown(f"- **[{r['name']}]({r['url']})** ({r['language']}) - ⭐ {r['stars']}")
+    
+    # Literature Review - Use dynamic resource finder
+    st.markdown("#### 📚 Literature Review:")
+    lit_resources = find_relevant_resources(bundle["keywords"], top_n=10)
+    for resource in lit_resources:
+        st.markdown(f"**{resource['type']}** - [{resource['name']}]({resource['url']})")
+        st.caption(resource['description'])
+    
+    st.markdown("#### 📄 Generated Docs")
+    st.markdown(bundle["docs"])
+    st.download_button("💾 Download", bundle["docs"], f"{idea['title']}.md", key=f"download_{i}")
+
+@st.fragment
+def idea_content_fragment(idea, i):
+    identify_caller()
+    if idea['summary']: st.markdown(f"**Summary:** {idea['summary']}")
+    if idea['tech_stack']: st.markdown(f"**Tech Stack:** {idea['tech_stack']}")
+    st.markdown("---")
+    
+    content_key = idea_key(idea)
+    bundle = get_artifact(content_key)
+    regenerate = False
+    if bundle is None:
+        generate_content = st.button(f"📝 Generate Required Contents", key=f"content_{i}")
+    else:
+        generate_content = False
+        regenerate = st.button("🔄 Regenerate", key=f"regenerate_{i}")
+    
+    if generate_content or regenerate:
+        with st.spinner("🔍 Extracting keywords..."), queue_feedback(queue_notice(st.empty())):
+            keywords = extract_keywords(f"{idea['title']}. {idea['summary']}")
+            
+            # GitHub Search
+            github_results = search_github_repos(keywords)
+            
+            # Content Gen
+            with st.spinner("📄 Generating docs..."):
+                content_text = generate_project_docs(idea)
         
-        # Helper for Window file locking
-        def clear_vector_db(path):
-            if os.path.exists(path):
-                import gc
-                import time
-                try:
-                    shutil.rmtree(path)
-                except PermissionError:
-                    gc.collect()
-                    time.sleep(1)
-                    try:
-                        shutil.rmtree(path)
-                    except Exception as e:
-                        st.error(f"⚠️ Could not delete old DB (File in use). Please restart app locally. Error: {e}")
-                except Exception as e:
-                    st.error(f"❌ Error clearing database: {e}")
+        bundle = {"keywords": keywords, "github": github_results, "docs": content_text}
+        if not content_text.startswith(("❌", "⚠️")):
+            put_artifact(content_key, "content", bundle)
+    
+    if bundle is not None:
+        render_idea_content(idea, bundle, i)
 
+@st.fragment
+def slide_decks_fragment(ideas_list):
+    st.markdown("### 📊 Slide Decks")
+    st.caption("Decks are built when you download them and include GitHub repositories for every idea whose contents you've generated.")
+    
+    # Decks are rendered when the button is clicked, by Streamlit's deferred-download
+    # handler on a worker thread (asyncio.to_thread), not on the script thread. The live
+    # session dict is read then, so contents generated since this rendered are included
+    artifacts = session_artifacts() or {}
+    def repos_by_title():
+        repos = {}
+        for idea in ideas_list:
+            bundle = artifacts.get(idea_key(idea))
+            if bundle:
+                repos[idea["title"]] = bundle["github"]
+        return repos
+    
+    col_deck, col_zip = st.columns(2)
+    with col_deck:
+        st.download_button("📊 Download All Ideas (PPTX)", lambda: build_deck(ideas_list, repos_by_title()).getvalue(),
+                           "hackathon_ideas.pptx", mime=PPTX_MIME, key="download_deck", use_container_width=True)
+    with col_zip:
+        st.download_button("🗂️ Download Separate Decks (ZIP)", lambda: build_deck_zip(ideas_list, repos_by_title()).getvalue(),
+                           "hackathon_idea_decks.zip", mime="application/zip", key="download_decks_zip",
+                           use_container_width=True)
 
-        if st.sidebar.button("🗑️ Clear Old Vector DB"):
-            vector_db_path = os.path.join(tempfile.gettempdir(), "chroma_db")
-            if os.path.exists(vector_db_path):
-                clear_vector_db(vector_db_path)
-                if not os.path.exists(vector_db_path):
-                    st.sidebar.success("✅ Old vector database cleared!")
-            else:
-                st.sidebar.info("ℹ️ No existing database found")
+@st.fragment
+def ideas_fragment():
+    st.markdown("---")
+    st.markdown("## 💡 Generated Hackathon Ideas")
+    st.markdown(st.session_state.get("raw_ideas", ""))
     
-        if st.sidebar.button("🔄 Create Vector DB"):
-            with st.spinner("Creating vector database..."):
-                vector_db_path = os.path.join(tempfile.gettempdir(), "chroma_db")
-                clear_vector_db(vector_db_path)
-                # Only create if cleared or didn't exist
-                create_vector_db("data/topics.docx")
-                st.sidebar.success("✅ Vector DB created successfully!")
+    ideas_list = st.session_state["parsed_ideas"]
+    st.markdown("---")
+    st.markdown("## 📋 Generate Required Contents")
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### ℹ️ How It Works")
-    st.sidebar.markdown("""
-    1. **Upload Topics** (Optional)
-    2. **Enter Description**
-    3. **Generate Ideas**
-    4. **Generate Content**
-    """)
+    for i, idea in enumerate(ideas_list):
+        with st.expander(f"💡 Idea {i+1}: {idea['title']}", expanded=False):
+            idea_content_fragment(idea, i)
     
-    st.sidebar.info("🌐 **Note:** This is a shared knowledge base! If you update the topics, it updates for everyone.")
+    slide_decks_fragment(ideas_list)
+
+# --- Main App Logic ---
+if st.session_state["user"] is None:
+    show_login_page()
+else:
+    # User is logged in
+    user = st.session_state["user"]
+    username = user["username"]
+    is_admin = user["is_admin"]
+    # LLM calls from this session are queued fairly per user; admins skip the queue
+    identify_caller()
+
+    # --- Header & Credits ---
+    header_fragment(username, is_admin)
+
+    # --- Usage & Cost (admin only) ---
+    if is_admin:
+        usage_fragment()
+
+    st.markdown("Generate innovative project ideas using your hackathon description and uploaded topics!")
+    
+    # --- Sidebar ---
+    with st.sidebar:
+        st.header("🏷️ Event")
+        event_code = st.text_input(
+            "Event code",
+            placeholder="Blank = your private topics",
+            help="Topics are stored per event. Share the code with co-organisers to use the same knowledge base; "
+                 "only the organiser who uploads first can replace or clear it."
+        ).strip()
+        topics_namespace = namespace_for(username, event_code)
+        if topics_namespace is None:
+            st.error("🚫 Codes starting with 'user:' are reserved for private topics.")
+            event_code, topics_namespace = "", user_namespace(username)
+        
+        topics_sidebar_fragment(topics_namespace, username, is_admin)
+        
+        st.markdown("---")
+        st.markdown("### ℹ️ How It Works")
+        st.markdown("""
+        1. **Upload Topics** (Optional)
+        2. **Enter Description**
+        3. **Generate Ideas**
+        4. **Generate Content**
+        """)
+        
+        api_access_fragment(username)
+        
+        applies_to = f"event **{event_code}**" if event_code else "your own sessions"
+        st.info(f"🌐 **Note:** Topics you upload only apply to {applies_to}. Without an upload, the shared default knowledge base is used.")
     
     # --- Main Input Area ---
     st.markdown("## 📝 Hackathon Description")
@@ -207,7 +390,7 @@ else:
         if not hackathon_text:
             st.warning("⚠️ Please enter a hackathon description first.")
         else:
-            with st.spinner("Analyzing theme..."):
+            with st.spinner("Analyzing theme..."), queue_feedback(queue_notice(st.empty())):
                 summary = summarize_text(hackathon_text)
                 st.session_state["summary"] = summary
                 st.markdown("### 🧠 Summarized Theme")
@@ -217,126 +400,38 @@ else:
     if generate_btn:
         if not hackathon_text:
             st.warning("⚠️ Please enter a hackathon description first.")
-        # Check Credits
-        elif current_credits <= 0 and not is_admin:
+        # Take the credit up front (atomic, so two tabs can't spend the same one)
+        elif not is_admin and not auth.consume_credit(username):
             st.error("🚫 You have run out of credits! Ask the admin for more or create a new account.")
         else:
-            with st.spinner("🔍 Analyzing and generating innovative ideas..."):
-                # Deduct Credit if not admin
-                if not is_admin:
-                    auth.decrement_credits(username)
-                    st.toast(f"Trial used! {current_credits - 1} remaining.", icon="ℹ️")
-                
+            with st.spinner("🔍 Analyzing and generating innovative ideas..."), queue_feedback(queue_notice(st.empty())):
                 # --- Generation Process ---
                 summary = summarize_text(hackathon_text)
                 st.session_state["summary"] = summary
-                retrieved_topics = retrieve_relevant_topics(summary)
-                resources = find_relevant_resources(summary)
-                ideas = generate_hackathon_ideas(summary, retrieved_topics, resources)
+                if summary.startswith(("❌", "⚠️")):
+                    ideas = summary
+                else:
+                    retrieved_topics = retrieve_relevant_topics(summary, namespace=topics_namespace)
+                    resources = find_relevant_resources(summary)
+                    ideas = generate_hackathon_ideas(summary, retrieved_topics, resources)
                 st.session_state["raw_ideas"] = ideas
                 
-                st.markdown("---")
-                st.markdown("## 💡 Generated Hackathon Ideas")
-                st.markdown(ideas)
+                # Failed or shed requests are free
+                if not is_admin:
+                    if ideas.startswith(("❌", "⚠️")):
+                        auth.refund_credit(username)
+                    else:
+                        st.toast(f"Trial used! {auth.get_credits(username)} remaining.", icon="ℹ️")
                 
                 # Parse ideas for content generation
-                lines = ideas.split('\n')
-                parsed_ideas = []
-                for line in lines:
-                    if '|' in line and not line.strip().startswith('|---'):
-                        cells = [c.strip() for c in line.split('|') if c.strip()]
-                        if cells and cells[0].lower() not in ['title', 'summary', 'tech stack', 'example repo', 'novelty']:
-                             # Simple 3-column check
-                            if len(cells) >= 2:
-                                parsed_ideas.append({
-                                    'title': cells[0],
-                                    'summary': cells[1] if len(cells) > 1 else '',
-                                    'tech_stack': cells[2] if len(cells) > 2 else '',
-                                })
-                
-                # Fallback parsing
-                if not parsed_ideas:
-                    title_pattern = r'(?:\d+\.\s*\*\*|###?\s*)([^:\n]+)'
-                    titles = re.findall(title_pattern, ideas)
-                    for title in titles[:5]:
-                        parsed_ideas.append({'title': title.strip('*').strip(), 'summary': '', 'tech_stack': ''})
-                
-                st.session_state["parsed_ideas"] = parsed_ideas[:5]
+                st.session_state["parsed_ideas"] = parse_ideas(ideas)
 
-    # --- Content Generation & Footer ---
-    def extract_keywords_from_text(text):
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "system", "content": "Extract 3-5 keywords, comma-separated."},
-                          {"role": "user", "content": f"Extract from: {text}"}],
-                temperature=0.3, max_tokens=50
-            )
-            return response.choices[0].message.content.strip()
-        except:
-            return text[:50]
-
-    if "parsed_ideas" in st.session_state and st.session_state["parsed_ideas"]:
-        ideas_list = st.session_state["parsed_ideas"]
-        st.markdown("---")
-        st.markdown("## 📋 Generate Required Contents")
-        
-        for i, idea in enumerate(ideas_list):
-            with st.expander(f"💡 Idea {i+1}: {idea['title']}", expanded=False):
-                if idea['summary']: st.markdown(f"**Summary:** {idea['summary']}")
-                if idea['tech_stack']: st.markdown(f"**Tech Stack:** {idea['tech_stack']}")
-                st.markdown("---")
-                
-                if st.button(f"📝 Generate Required Contents", key=f"content_{i}"):
-                    
-                    with st.spinner("🔍 Extracting keywords..."):
-                        keywords = extract_keywords_from_text(f"{idea['title']}. {idea['summary']}")
-                        st.info(f"🔑 Keywords: {keywords}")
-                        
-                        # GitHub Search
-                        github_results = []
-                        try:
-                            q = keywords.replace(',', ' ').strip()
-                            url = f"https://api.github.com/search/repositories?q={q}+stars:>100&sort=stars&order=desc&per_page=5"
-                            headers = {"Accept": "application/vnd.github+json"}
-                            if "github_token" in st.secrets: headers["Authorization"] = f"token {st.secrets['github_token']}"
-                            resp = requests.get(url, headers=headers, timeout=10)
-                            if resp.status_code == 200:
-                                items = resp.json().get("items", [])
-                                for item in items:
-                                    github_results.append({
-                                        "name": item.get("name"), "url": item.get("html_url"),
-                                        "description": item.get("description"), "stars": item.get("stargazers_count"),
-                                        "language": item.get("language")
-                                    })
-                        except: pass
-                        
-                        if github_results:
-                            st.markdown("#### 🔗 GitHub Repositories:")
-                            for r in github_results:
-                                st.markdown(f"- **[{r['name']}]({r['url']})** ({r['language']}) - ⭐ {r['stars']}")
-                        
-                        # Literature Review - Use dynamic resource finder
-                        st.markdown("#### 📚 Literature Review:")
-                        lit_resources = find_relevant_resources(keywords, top_n=10)
-                        for resource in lit_resources:
-                            st.markdown(f"**{resource['type']}** - [{resource['name']}]({resource['url']})")
-                            st.caption(resource['description'])
-                        
-                        # Content Gen
-                        with st.spinner("📄 Generating docs..."):
-                            prompt = f"Generate project docs for: {idea['title']}. Summary: {idea['summary']}. Tech: {idea['tech_stack']}. Sections: Overview, Problem, Solution, Architecture, Requirements, Impact, Future."
-                            resp = client.chat.completions.create(
-                                model="gpt-4o", messages=[
-                                    {"role": "system", "content": "You are a tech writer."},
-                                    {"role": "user", "content": prompt}
-                                ], temperature=0.7
-                            )
-                            content_text = resp.choices[0].message.content.strip()
-                            st.markdown("#### 📄 Generated Docs")
-                            st.markdown(content_text)
-                            st.download_button("💾 Download", content_text, f"{idea['title']}.md")
+    # --- Ideas & Content Generation ---
+    if st.session_state.get("parsed_ideas"):
+        ideas_fragment()
+    elif generate_btn and st.session_state.get("raw_ideas"):
+        st.markdown(st.session_state["raw_ideas"])
 
     # Footer
     st.markdown("---")
-    st.markdown("<div style='text-align: center; color: #666;'>🚀 Powered by OpenAI GPT-4 | Built with Streamlit</div>", unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown("<div style='text-align: center; color: #666;'>🚀 Powered by OpenAI GPT-4 | Built with Streamlit</div>", unsafe_allow_html=True)
@@ -0,0 +1,287 @@
+"""
+Resumable batch idea generation.
+
+Streams hackathon descriptions from a JSONL or CSV file and runs each one
+through summarize -> retrieve -> generate, a few at a time. Results are
+appended to a JSONL file as they finish, and that file is the checkpoint:
+rerunning the same command skips every input already written, so a crash
+or Ctrl-C resumes where it stopped. Identical descriptions (same text and
+namespace) are generated once; later copies are written as duplicates.
+
+Each input id gets one row. --retry-errors removes failed rows (and
+duplicates of them) from the file before regenerating them. A row whose id
+was already used for different text is written with status "invalid".
+
+Usage (from the repo root):
+    python -m scripts.batch_generate catalog.jsonl -o ideas.jsonl --concurrency 4
+    python -m scripts.batch_generate catalog.csv -o ideas.jsonl --text-field Description
+    python -m scripts.batch_generate catalog.jsonl -o ideas.jsonl --stub-llm   # offline, no API spend
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+TEXT_FIELDS = ("description", "text", "body", "summary")
+ID_FIELDS = ("id", "request_id")
+FSYNC_EVERY = 20
+
+
+def iter_records(path, fmt=None):
+    """Yields one dict per input row, streaming the file."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping malformed JSON on line {line_no}", file=sys.stderr)
+
+
+def pick_field(record, field, candidates):
+    if field:
+        return record.get(field)
+    for name in candidates:
+        # 0 is a valid id; empty CSV cells are not
+        if record.get(name) not in (None, ""):
+            return record[name]
+    return None
+
+
+def input_key(text, namespace):
+    """Dedupe key: identical (whitespace-normalised) text for the same namespace."""
+    normalised = " ".join(text.split())
+    return hashlib.sha256(json.dumps([namespace, normalised]).encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(output_path, retry_errors=False):
+    """
+    Reads rows from a previous run. Returns ({key: id} of successfully
+    generated inputs, {id: key} of inputs already written, set of (id, key)
+    already rejected as id conflicts). A torn last line from a crash is
+    truncated away. With retry_errors, failed rows and duplicates of inputs
+    that never succeeded are removed from the file, so they can be rerun
+    without leaving two rows for one id.
+    """
+    done, written, rejected = {}, {}, set()
+    if not os.path.exists(output_path):
+        return done, written, rejected
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+            data = data[:complete]
+
+    rows = []
+    for line in data.decode("utf-8").splitlines():
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    for row in rows:
+        if row.get("status") == "ok":
+            done.setdefault(row["key"], row["id"])
+
+    kept = []
+    for row in rows:
+        status = row.get("status")
+        if retry_errors and (status == "error" or (status == "duplicate" and row["key"] not in done)):
+            continue
+        kept.append(row)
+        if status == "invalid":
+            rejected.add((row["id"], row["key"]))
+        else:
+            written.setdefault(row["id"], row["key"])
+
+    if len(kept) < len(rows):
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in kept:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+    return done, written, rejected
+
+
+def is_error(text):
+    return isinstance(text, str) and text.startswith(("❌", "⚠️"))
+
+
+def generate_one(record_id, key, text, namespace):
+    """Runs the pipeline for one description. Blocking; called on a worker thread."""
+    from utils.resource_finder import find_relevant_resources
+    from utils.retriever import retrieve_relevant_topics
+    from utils.scheduler import set_caller
+    from utils.summarizer import summarize_text
+    from utils.topic_generator import generate_hackathon_ideas, parse_ideas
+
+    set_caller("batch")
+    started = time.perf_counter()
+    row = {"id": record_id, "key": key, "namespace": namespace}
+    try:
+        summary = summarize_text(text)
+        if is_error(summary):
+            return {**row, "status": "error", "error": summary}
+        topics = retrieve_relevant_topics(summary, namespace=namespace)
+        resources = find_relevant_resources(summary)
+        ideas = generate_hackathon_ideas(summary, topics, resources)
+        if is_error(ideas):
+            return {**row, "status": "error", "error": ideas}
+        row.update(status="ok", summary=summary, topics=topics, markdown=ideas, ideas=parse_ideas(ideas))
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    row["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return row
+
+
+class ResultWriter:
+    """Appends one JSON line per result, flushed immediately and fsynced periodically."""
+
+    def __init__(self, path):
+        self._f = open(path, "a", encoding="utf-8")
+        self._since_sync = 0
+
+    def write(self, row):
+        row["finished_at"] = time.time()
+        self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._f.flush()
+        self._since_sync += 1
+        if self._since_sync >= FSYNC_EVERY:
+            os.fsync(self._f.fileno())
+            self._since_sync = 0
+
+    def close(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+def run(args):
+    # Import once up front rather than from several worker threads at the same time
+    import utils.retriever  # noqa: F401
+    import utils.topic_generator  # noqa: F401
+
+    done, written, rejected = load_checkpoint(args.output, retry_errors=args.retry_errors)
+    writer = ResultWriter(args.output)
+    counts = {"ok": 0, "error": 0, "duplicate": 0, "skipped": 0, "invalid": 0}
+    in_flight = {}  # key -> id currently being generated
+    pending = set()
+    started = time.perf_counter()
+
+    def record_result(row):
+        counts[row["status"]] += 1
+        # Failed inputs stay out of `done`, so later copies are generated rather than marked duplicates
+        if row["status"] == "ok":
+            done[row["key"]] = row["id"]
+        in_flight.pop(row["key"], None)
+        writer.write(row)
+
+    def drain(block_until):
+        nonlocal pending
+        while len(pending) > block_until:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.cancelled():
+                    # Never started (cancelled on Ctrl-C); the next run picks it up
+                    continue
+                record_result(future.result())
+                total = counts["ok"] + counts["error"]
+                if total % args.progress_every == 0:
+                    rate = total / (time.perf_counter() - started)
+                    print(f"  {total} generated ({counts['error']} errors, {counts['duplicate']} duplicates) "
+                          f"- {rate:.2f}/s", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch") as pool:
+        try:
+            for n, record in enumerate(iter_records(args.input, args.format)):
+                if args.limit and n >= args.limit:
+                    break
+                text = pick_field(record, args.text_field, TEXT_FIELDS)
+                record_id = pick_field(record, args.id_field, ID_FIELDS)
+                record_id = f"row-{n + 1}" if record_id in (None, "") else str(record_id)
+                namespace = record.get(args.namespace_field) if args.namespace_field else args.namespace
+                if not isinstance(text, str) or not text.strip():
+                    counts["invalid"] += 1
+                    continue
+
+                key = input_key(text, namespace)
+                previous_key = written.get(record_id)
+                if previous_key == key or (record_id, key) in rejected:
+                    counts["skipped"] += 1
+                    continue
+                if previous_key is not None:
+                    # Same id, different text: flag it rather than silently dropping it
+                    writer.write({"id": record_id, "key": key, "namespace": namespace, "status": "invalid",
+                                  "error": f"id {record_id} was already used for a different input"})
+                    rejected.add((record_id, key))
+                    counts["invalid"] += 1
+                    continue
+                written[record_id] = key
+
+                original = done.get(key) or in_flight.get(key)
+                if original is not None:
+                    writer.write({"id": record_id, "key": key, "namespace": namespace,
+                                  "status": "duplicate", "duplicate_of": original})
+                    counts["duplicate"] += 1
+                    continue
+
+                in_flight[key] = record_id
+                pending.add(pool.submit(generate_one, record_id, key, text, namespace))
+                # Bounded look-ahead: never read far past what the workers can take
+                drain(args.concurrency * 2)
+            drain(0)
+        except KeyboardInterrupt:
+            print("Interrupted - finishing in-flight requests; rerun the same command to resume.", file=sys.stderr)
+            for future in pending:
+                future.cancel()
+            drain(0)
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Done in {elapsed:.1f}s: {counts['ok']} ok, {counts['error']} errors, {counts['duplicate']} duplicates, "
+          f"{counts['skipped']} already done, {counts['invalid']} invalid (no text or reused id)")
+    return 1 if counts["error"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL or CSV file of hackathon descriptions")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: by file extension)")
+    parser.add_argument("--text-field", help=f"Field holding the description (default: first of {', '.join(TEXT_FIELDS)})")
+    parser.add_argument("--id-field", help=f"Field holding a stable row id (default: first of {', '.join(ID_FIELDS)}, else row number)")
+    parser.add_argument("--namespace", help="Event code whose uploaded topics to retrieve from (default: shared index)")
+    parser.add_argument("--namespace-field", help="Per-row field holding the event code instead of --namespace")
+    parser.add_argument("--concurrency", type=int, default=4, help="Descriptions processed at once")
+    parser.add_argument("--limit", type=int, default=0, help="Only read the first N input rows")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-run inputs that failed in a previous run")
+    parser.add_argument("--progress-every", type=int, default=10)
+    parser.add_argument("--stub-llm", action="store_true", help="Use the offline OpenAI/GitHub stubs (no network, no spend)")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="Seconds per stubbed LLM call")
+    args = parser.parse_args(argv)
+
+    if args.stub_llm:
+        # Must patch OpenAI before any utils module is imported
+        from scripts.stubs import install_stubs
+        install_stubs(llm_latency=args.stub_latency, github_latency=0.05, jitter=args.stub_latency / 4)
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
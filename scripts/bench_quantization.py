@@ -0,0 +1,130 @@
+"""
+Recall/memory benchmark for quantized topic index storage.
+
+Builds the NumPy sidecar in float32, float16 and int8 (with and without
+exact float32 rescoring) from the same embeddings, and compares each
+against exact float32 search: recall@k, query latency, scanned-matrix
+memory and bytes on disk.
+
+Usage (from the repo root):
+    python -m scripts.bench_quantization                       # synthetic 384-d corpus
+    python -m scripts.bench_quantization --docx data/topics.docx
+    python -m scripts.bench_quantization --sidecar /tmp/chroma_db/numpy topics_myevent_1a2b3c4d
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from utils.backends import NumpyBackend, NumpyIndexWriter
+from utils.embeddings import EMBEDDING_DIM
+
+CONFIGS = [
+    ("float32", True),
+    ("float16", True),
+    ("float16", False),
+    ("int8", True),
+    ("int8", False),
+]
+
+
+def synthetic_corpus(n, dim, clusters=50, seed=0):
+    """Clustered unit vectors, roughly shaped like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def docx_corpus(path):
+    from utils.embeddings import get_embeddings
+    from utils.ingest import iter_chunks, iter_document_blocks
+
+    chunks = list(iter_chunks(iter_document_blocks(path)))
+    return np.asarray(get_embeddings().embed_documents(chunks), dtype=np.float32)
+
+
+def sidecar_corpus(directory, name):
+    backend = NumpyBackend.load(directory, name)
+    if backend is None or backend.vectors is None:
+        raise SystemExit("Sidecar not found or has no float32 vectors to compare against.")
+    return np.asarray(backend.vectors, dtype=np.float32)
+
+
+def make_queries(corpus, count, noise=0.3, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = corpus[rng.integers(0, len(corpus), count)]
+    queries = picks + noise * rng.normal(size=picks.shape) / np.sqrt(corpus.shape[1])
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def dir_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+
+
+def run(corpus, queries, k):
+    n = len(corpus)
+    exact = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    texts = [str(i) for i in range(n)]
+    rows = []
+
+    for dtype, rescore in CONFIGS:
+        workdir = tempfile.mkdtemp(prefix="bench_q_")
+        try:
+            writer = NumpyIndexWriter(workdir, "bench", dim=corpus.shape[1], dtype=dtype, keep_float32=rescore)
+            writer.add(texts, corpus)
+            writer.close()
+            backend = NumpyBackend.load(workdir, "bench")
+
+            hits = 0
+            start = time.perf_counter()
+            for qi, query in enumerate(queries):
+                found = {int(text) for text, _ in backend.search(query, k=k)}
+                hits += len(found & set(exact[qi].tolist()))
+            elapsed = time.perf_counter() - start
+
+            rows.append({
+                "dtype": dtype,
+                "rescore": rescore if dtype != "float32" else "-",
+                "recall": hits / (len(queries) * k),
+                "latency_ms": elapsed / len(queries) * 1000,
+                "scan_mb": backend.scan_bytes() / 1e6,
+                "disk_mb": dir_bytes(workdir) / 1e6,
+            })
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--docx", help="Embed this DOCX/PDF with the MiniLM model and benchmark it")
+    source.add_argument("--sidecar", nargs=2, metavar=("DIR", "NAME"), help="Use an existing float32 sidecar")
+    parser.add_argument("--size", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.docx:
+        corpus = docx_corpus(args.docx)
+    elif args.sidecar:
+        corpus = sidecar_corpus(*args.sidecar)
+    else:
+        corpus = synthetic_corpus(args.size, EMBEDDING_DIM)
+
+    queries = make_queries(corpus, args.queries)
+    rows = run(corpus, queries, args.k)
+
+    print(f"corpus={len(corpus)} dim={corpus.shape[1]} queries={len(queries)} k={args.k}")
+    print(f"{'dtype':>8} {'rescore':>8} {f'recall@{args.k}':>10} {'ms/query':>9} {'scan MB':>8} {'disk MB':>8}")
+    for r in rows:
+        print(f"{r['dtype']:>8} {str(r['rescore']):>8} {r['recall']:>10.4f} "
+              f"{r['latency_ms']:>9.3f} {r['scan_mb']:>8.2f} {r['disk_mb']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Build the prebuilt, read-only topics index ("warm index") offline.
+
+Chunks and embeds data/topics.docx once and writes a versioned artifact
+(NumPy sidecars, BM25 index and a manifest with file checksums) to
+WARM_INDEX_DIR. Instances open it at startup read-only and memory-mapped,
+so a fresh deploy serves retrieval without embedding anything.
+
+The artifact is built in a staging directory and swapped in only once its
+manifest is written, so a failed build leaves the previous one in place.
+
+Usage (from the repo root):
+    python -m scripts.build_index                                   # embed data/topics.docx
+    python -m scripts.build_index --from-chroma vectorstore/chroma_db   # reuse shipped embeddings
+    python -m scripts.build_index --verify-only                     # check an existing artifact
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from utils.backends import INDEX_DTYPES, NumpyIndexWriter
+from utils.ingest import CHUNK_OVERLAP, CHUNK_SIZE, file_sha256
+from utils.lexical import BM25Index
+from utils.warm_index import (
+    INDEX_NAME, WARM_INDEX_DIR, WARM_INDEX_SOURCE, WarmIndexError, bm25_path, load_warm_index, numpy_dir,
+    write_manifest,
+)
+
+
+def build_from_document(source, staging, dtype):
+    """Streams the document through the chunker and embedder into the artifact."""
+    from utils.embeddings import get_embedding_backend, get_embeddings
+    from utils.ingest import iter_document_batches
+
+    embeddings = get_embeddings()
+    writer = NumpyIndexWriter(numpy_dir(staging), INDEX_NAME, dtype=dtype)
+    lexical = BM25Index()
+    try:
+        for batch in iter_document_batches(source):
+            writer.add(batch, embeddings.embed_documents(batch))
+            lexical.add_documents(batch)
+            print(f"  embedded {writer.count} chunks", file=sys.stderr)
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    lexical.save(bm25_path(staging))
+    return writer.count, get_embedding_backend()
+
+
+def build_from_chroma(persist_directory, staging, dtype):
+    """Copies texts and embeddings out of an existing Chroma collection; no model needed."""
+    import chromadb
+
+    # Chroma writes to its directory even on reads, so read from a throwaway copy
+    with tempfile.TemporaryDirectory() as working_copy:
+        shutil.copytree(persist_directory, working_copy, dirs_exist_ok=True)
+        client = chromadb.PersistentClient(path=working_copy)
+        data = client.get_collection(INDEX_NAME).get(include=["documents", "embeddings"])
+    writer = NumpyIndexWriter(numpy_dir(staging), INDEX_NAME, dtype=dtype)
+    try:
+        if len(data["documents"]):
+            writer.add(data["documents"], data["embeddings"])
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    lexical = BM25Index()
+    lexical.add_documents(data["documents"])
+    lexical.save(bm25_path(staging))
+    return writer.count, f"chroma:{persist_directory}"
+
+
+def publish(staging, out):
+    """Swaps the finished staging directory in for the live artifact."""
+    previous = f"{out}.previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(out):
+        os.replace(out, previous)
+    os.replace(staging, out)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=WARM_INDEX_SOURCE, help="Topics document to embed (.docx or .pdf)")
+    parser.add_argument("--out", default=WARM_INDEX_DIR, help="Artifact directory (default: WARM_INDEX_DIR)")
+    parser.add_argument("--dtype", choices=INDEX_DTYPES, default="float32", help="Stored vector precision")
+    parser.add_argument("--from-chroma", metavar="DIR",
+                        help="Export embeddings from this Chroma directory instead of embedding --source")
+    parser.add_argument("--verify-only", action="store_true", help="Only verify the checksums of --out")
+    args = parser.parse_args(argv)
+
+    if args.verify_only:
+        try:
+            loaded = load_warm_index(args.out, verify=True)
+        except WarmIndexError as e:
+            print(f"❌ {args.out}: {e}", file=sys.stderr)
+            return 1
+        if loaded is None:
+            print(f"❌ No warm index in {args.out}", file=sys.stderr)
+            return 1
+        print(f"✅ {args.out}: version {loaded[2]['index_version']}, {loaded[2]['count']} chunks")
+        return 0
+
+    if args.from_chroma:
+        # The vectors come from the Chroma store (and whatever chunker filled it), not from --source
+        source_path = os.path.join(args.from_chroma, "chroma.sqlite3")
+    else:
+        source_path = args.source
+    if not os.path.exists(source_path):
+        print(f"❌ Source {source_path} not found", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    staging = f"{args.out}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        if args.from_chroma:
+            count, embedding_backend = build_from_chroma(args.from_chroma, staging, args.dtype)
+            chunking = None
+        else:
+            count, embedding_backend = build_from_document(args.source, staging, args.dtype)
+            chunking = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+        # Recorded so instances can warn when the source changes after the build
+        source = {"path": source_path, "sha256": file_sha256(source_path)}
+        manifest = write_manifest(staging, count, args.dtype, source, embedding_backend, chunking=chunking)
+        publish(staging, args.out)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    size = sum(f["bytes"] for f in manifest["files"].values())
+    print(f"✅ Built warm index {manifest['index_version']} in {args.out}: {count} chunks, "
+          f"{size / 1024:.0f} KiB, {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
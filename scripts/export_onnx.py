@@ -0,0 +1,137 @@
+"""
+Export all-MiniLM-L6-v2 to int8-quantized ONNX for the ONNX Runtime embedder.
+
+Writes model.onnx (float32), model_quantized.onnx (dynamic int8) and
+tokenizer.json to ONNX_MODEL_DIR, then checks output parity against the
+PyTorch sentence-transformers model and reports cold-start and per-query
+latency for both.
+
+Usage (from the repo root):
+    python -m scripts.export_onnx                 # export + parity check
+    python -m scripts.export_onnx --check-only    # re-run the parity check
+Then run the app with EMBEDDING_BACKEND=onnx.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.embeddings import MODEL_NAME, ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxMiniLMEmbeddings
+
+PARITY_SENTENCES = [
+    "Build an AI-powered healthcare solution for rural clinics.",
+    "RAG pipeline over LoRaWAN sensor logs",
+    "Smart Health Surveillance and Early Warning System for water-borne diseases.",
+    "Blockchain-based supply chain transparency for farmers",
+    "Show me salinity profiles near the equator in March 2023",
+    "A chatbot that answers questions about railway track maintenance records.",
+    "Hackathon",
+    "Real-time dashboards for disaster management with multilingual alerts " * 20,
+]
+
+# Minimum cosine similarity between ONNX int8 and PyTorch embeddings
+MIN_COSINE = 0.98
+
+
+def export(model_dir, opset=14):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME).eval()
+
+    class Encoder(torch.nn.Module):
+        """Keyword-call wrapper: the positional order of BertModel.forward varies by version."""
+
+        def __init__(self, bert):
+            super().__init__()
+            self.bert = bert
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.bert(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    dynamic = {0: "batch", 1: "sequence"}
+    fp32_path = os.path.join(model_dir, "model.onnx")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(model),
+            inputs,
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "last_hidden_state": dynamic,
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    quantize_dynamic(fp32_path, os.path.join(model_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, "tokenizer.json"))
+    print(f"Exported to {model_dir}")
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def check_parity(model_dir):
+    """Compares ONNX and PyTorch embeddings. Returns True if within tolerance."""
+    from utils.embeddings import _load_torch_embeddings
+
+    torch_model, torch_load = _timed(_load_torch_embeddings)
+    onnx_model, onnx_load = _timed(lambda: OnnxMiniLMEmbeddings(model_dir))
+
+    expected = np.asarray(torch_model.embed_documents(PARITY_SENTENCES))
+    actual = np.asarray(onnx_model.embed_documents(PARITY_SENTENCES))
+    cosines = (expected * actual).sum(axis=1)
+
+    # Rankings must agree too: nearest neighbour of each sentence
+    same_neighbours = np.mean(
+        np.argsort(-(expected @ expected.T), axis=1)[:, 1] == np.argsort(-(actual @ actual.T), axis=1)[:, 1]
+    )
+
+    query = PARITY_SENTENCES[0]
+    _, torch_query = _timed(lambda: [torch_model.embed_query(query) for _ in range(20)])
+    _, onnx_query = _timed(lambda: [onnx_model.embed_query(query) for _ in range(20)])
+
+    print(f"cosine min={cosines.min():.4f} mean={cosines.mean():.4f} (threshold {MIN_COSINE})")
+    print(f"nearest-neighbour agreement: {same_neighbours:.0%}")
+    print(f"load time    torch={torch_load:.2f}s  onnx={onnx_load:.2f}s")
+    print(f"query embed  torch={torch_query / 20 * 1000:.1f}ms  onnx={onnx_query / 20 * 1000:.1f}ms")
+
+    return cosines.min() >= MIN_COSINE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--check-only", action="store_true", help="Skip export, only run the parity check")
+    parser.add_argument("--no-check", action="store_true", help="Skip the parity check")
+    args = parser.parse_args(argv)
+
+    if not args.check_only:
+        export(args.model_dir)
+    if not args.no_check:
+        if not check_parity(args.model_dir):
+            print("❌ ONNX output does not match PyTorch within tolerance.")
+            sys.exit(1)
+        print("✅ ONNX output matches PyTorch.")
+
+
+if __name__ == "__main__":
+    main()
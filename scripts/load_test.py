@@ -0,0 +1,279 @@
+"""
+Concurrent-session load test for app.py.
+
+Drives simulated Streamlit sessions through login -> summarize -> generate
+-> content generation using Streamlit's AppTest harness, with the OpenAI
+and GitHub backends stubbed out. Reports throughput, tail latency, SQLite
+lock errors and RSS growth for each concurrency level.
+
+Each concurrent session runs in its own worker process (AppTest keeps
+process-global state), all sharing one users.db so SQLite contention is real.
+
+Usage (from the repo root):
+    python -m scripts.load_test --concurrency 1 4 16 32 --sessions-per-worker 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+STAGES = ["load", "login", "summarize", "generate", "content"]
+
+DESCRIPTION = (
+    "Build an AI-powered healthcare solution that helps hospitals triage "
+    "patients using real-time vitals and open medical datasets."
+)
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fallback: peak RSS (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def is_lock_error(message):
+    return "database is locked" in str(message).lower()
+
+
+class SessionResult:
+    def __init__(self):
+        self.timings = {}
+        self.errors = []
+        self.lock_errors = 0
+        self.completed = False
+        self.pid = os.getpid()
+        self.rss_start = current_rss_mb()
+        self.rss_end = self.rss_start
+
+
+def _button(at, label):
+    for btn in at.button:
+        if btn.label == label:
+            return btn
+    raise LookupError(f"Button not found: {label}")
+
+
+def _check(at, result, stage):
+    """Collect script exceptions raised during the last rerun."""
+    for exc in at.exception:
+        message = getattr(exc, "message", str(exc))
+        if is_lock_error(message):
+            result.lock_errors += 1
+        result.errors.append(f"{stage}: {message}")
+
+
+def run_session(username, password, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    result = SessionResult()
+
+    def timed(stage, action):
+        start = time.perf_counter()
+        action()
+        result.timings[stage] = time.perf_counter() - start
+        _check(at, result, stage)
+
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        timed("load", at.run)
+
+        def login():
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            _button(at, "Login").click().run()
+        timed("login", login)
+        if at.session_state["user"] is None:
+            result.errors.append("login: rejected")
+            return result
+
+        def summarize():
+            at.text_area[0].input(DESCRIPTION)
+            _button(at, "🧠 Summarize Theme").click().run()
+        timed("summarize", summarize)
+
+        timed("generate", lambda: _button(at, "✨ Generate Ideas").click().run())
+
+        if "parsed_ideas" not in at.session_state or not at.session_state["parsed_ideas"]:
+            result.errors.append("generate: no ideas parsed")
+            return result
+
+        def content():
+            # Another session may already have cached idea 1's content
+            keys = {btn.key for btn in at.button}
+            key = "content_0" if "content_0" in keys else "regenerate_0"
+            at.button(key=key).click().run()
+        timed("content", content)
+        result.completed = not result.errors
+    except sqlite3.OperationalError as e:
+        if is_lock_error(e):
+            result.lock_errors += 1
+        result.errors.append(f"sqlite: {e}")
+    except Exception as e:
+        result.errors.append(f"harness: {e}")
+    finally:
+        result.rss_end = current_rss_mb()
+    return result
+
+
+def init_worker(workdir, llm_latency, github_latency, jitter):
+    """
+    Prepare a worker process. AppTest keeps a process-global runtime, so each
+    concurrent session needs its own process rather than its own thread.
+    """
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from scripts.stubs import install_stubs
+    install_stubs(llm_latency, github_latency, jitter)
+    os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+    os.chdir(workdir)
+
+
+def register_users(prefix, count, password):
+    import utils.auth as auth
+
+    names = []
+    for i in range(count):
+        name = f"{prefix}{i}"
+        auth.register_user(name, password)
+        names.append(name)
+    return names
+
+
+def run_level(concurrency, sessions, password, args, level_idx):
+    users = register_users(f"load_c{concurrency}_{level_idx}_", sessions, password)
+
+    # AppTest swaps sys.modules["__main__"] for app.py inside workers, so hand
+    # the pool functions that pickle by their importable module path.
+    from scripts import load_test as worker
+
+    ctx = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=ctx,
+        initializer=worker.init_worker,
+        initargs=(os.getcwd(), args.llm_latency, args.github_latency, args.jitter),
+    ) as pool:
+        results = list(pool.map(worker.run_session, users, [password] * sessions, [args.timeout] * sessions))
+    wall = time.perf_counter() - start
+
+    # RSS per worker process: first observation vs last
+    workers = {}
+    for r in results:
+        first, last = workers.get(r.pid, (r.rss_start, r.rss_end))
+        workers[r.pid] = (min(first, r.rss_start), max(last, r.rss_end))
+    rss_total = sum(last for _, last in workers.values())
+    rss_growth = sum(last - first for first, last in workers.values())
+
+    completed = [r for r in results if r.completed]
+    report = {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "completed": len(completed),
+        "failed": sessions - len(completed),
+        "wall_s": round(wall, 3),
+        "throughput_sessions_per_s": round(len(completed) / wall, 3) if wall else 0.0,
+        "sqlite_lock_errors": sum(r.lock_errors for r in results),
+        "workers": len(workers),
+        "rss_total_mb": round(rss_total, 1),
+        "rss_growth_mb": round(rss_growth, 1),
+        "latency_s": {},
+        "sample_errors": [e for r in results for e in r.errors][:5],
+    }
+    for stage in STAGES:
+        values = [r.timings[stage] for r in results if stage in r.timings]
+        if values:
+            report["latency_s"][stage] = {
+                "p50": round(statistics.median(values), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(max(values), 3),
+            }
+    return report
+
+
+def print_report(reports):
+    header = f"{'conc':>5} {'ok':>5} {'fail':>5} {'sess/s':>8} {'locks':>6} {'rss+MB':>7} {'rssMB':>7}"
+    for stage in STAGES:
+        header += f" {stage + ' p95':>14}"
+    print(header)
+    for r in reports:
+        line = (
+            f"{r['concurrency']:>5} {r['completed']:>5} {r['failed']:>5} "
+            f"{r['throughput_sessions_per_s']:>8} {r['sqlite_lock_errors']:>6} "
+            f"{r['rss_growth_mb']:>7} {r['rss_total_mb']:>7}"
+        )
+        for stage in STAGES:
+            p95 = r["latency_s"].get(stage, {}).get("p95", "-")
+            line += f" {p95:>14}"
+        print(line)
+        for err in r["sample_errors"]:
+            print(f"      ! {err}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrent session counts to test, in order")
+    parser.add_argument("--sessions-per-worker", type=int, default=2,
+                        help="Sessions per concurrent worker at each level")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stubbed LLM latency (s)")
+    parser.add_argument("--github-latency", type=float, default=0.2, help="Stubbed GitHub latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform latency jitter (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-rerun timeout (s)")
+    parser.add_argument("--workdir", default=None,
+                        help="Working dir for users.db and data/ (default: fresh temp dir)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="hackgen_load_")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    print(f"Working directory: {workdir}")
+
+    password = "loadtest"
+    reports = []
+    for idx, concurrency in enumerate(args.concurrency):
+        sessions = concurrency * args.sessions_per_worker
+        print(f"Running {sessions} sessions at concurrency {concurrency}...")
+        reports.append(run_level(concurrency, sessions, password, args, idx))
+
+    print()
+    print_report(reports)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
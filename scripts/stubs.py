@@ -0,0 +1,157 @@
+"""
+Offline stand-ins for the OpenAI, GitHub and embedding backends.
+
+Used by the load test and the batch runner so the whole pipeline can be
+exercised without network access or API spend.
+"""
+import random
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+STUB_SUMMARY = (
+    "A 48-hour hackathon focused on AI for healthcare. Teams build tools that "
+    "help clinicians triage patients faster using open data and sensors."
+)
+
+STUB_KEYWORDS = "healthcare, machine learning, triage"
+
+STUB_IDEAS = """| Title | Summary | Tech Stack | Example Repo | Novelty |
+|-------|---------|------------|--------------|---------|
+| TriageLens | Ranks incoming ER patients from vitals and notes. | Python, FastAPI, scikit-learn | N/A | 🔥🔥🔥 |
+| WardWatch | Streams bedside sensor data and flags deterioration early. | MQTT, InfluxDB, PyTorch | N/A | 🔥🔥🔥🔥 |
+| MedSimplify | Rewrites discharge notes into plain language. | OpenAI, Streamlit | N/A | 🔥🔥 |
+| ClinicQueue | Predicts walk-in clinic wait times for patients. | Prophet, React | N/A | 🔥🔥 |
+| RxCheck | Cross-checks prescriptions for interactions at the bedside. | Flutter, SQLite | N/A | 🔥🔥🔥 |"""
+
+STUB_DOCS = """## Overview
+Stub project documentation.
+
+## Problem
+## Solution
+## Architecture
+## Requirements
+## Impact
+## Future"""
+
+STUB_GITHUB_ITEMS = [
+    {
+        "name": f"stub-repo-{i}",
+        "html_url": f"https://github.com/stub/stub-repo-{i}",
+        "description": "Stub repository",
+        "stargazers_count": 1000 - i,
+        "language": "Python",
+    }
+    for i in range(5)
+]
+
+
+def _sleep(latency, jitter):
+    if latency > 0:
+        time.sleep(max(0.0, random.uniform(latency - jitter, latency + jitter)))
+
+
+def _pick_reply(messages):
+    """Choose a canned reply based on which pipeline stage sent the prompt."""
+    text = " ".join(m.get("content", "") for m in messages).lower()
+    if "markdown table" in text or "hackathon ideas" in text:
+        return STUB_IDEAS
+    if "keyword" in text:
+        return STUB_KEYWORDS
+    if "project docs" in text or "tech writer" in text:
+        return STUB_DOCS
+    return STUB_SUMMARY
+
+
+class _StubCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=None, **kwargs):
+        _sleep(self._owner.latency, self._owner.jitter)
+        messages = messages or []
+        content = _pick_reply(messages)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+class StubOpenAI:
+    """Drop-in replacement for ``openai.OpenAI`` returning canned replies."""
+
+    latency = 0.0
+    jitter = 0.0
+
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+
+class StubEmbeddings:
+    """
+    Hashed bag-of-words vectors in place of MiniLM: deterministic, instant,
+    and no model download (which would hang or time out offline).
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def embed_query(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class _StubResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+
+def install_stubs(llm_latency=0.0, github_latency=0.0, jitter=0.0):
+    """
+    Patch ``openai.OpenAI``, GitHub calls made through ``requests.get`` and
+    the MiniLM embedder (used by retrieval and local keyword extraction).
+
+    Must run before any ``utils`` module is imported, since those bind
+    ``OpenAI`` at import time. Non-GitHub requests pass through untouched.
+    """
+    import openai
+    import requests
+
+    StubOpenAI.latency = llm_latency
+    StubOpenAI.jitter = jitter
+    openai.OpenAI = StubOpenAI
+
+    # utils.embeddings doesn't touch OpenAI, so importing it here is safe
+    import utils.embeddings as embeddings
+    stub_embedder = StubEmbeddings(embeddings.EMBEDDING_DIM)
+    embeddings._load_embeddings = lambda: stub_embedder
+
+    real_get = requests.get
+
+    def stub_get(url, *args, **kwargs):
+        if "api.github.com" in str(url):
+            _sleep(github_latency, jitter)
+            return _StubResponse({"items": STUB_GITHUB_ITEMS})
+        return real_get(url, *args, **kwargs)
+
+    requests.get = stub_get
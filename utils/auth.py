@@ -1,4 +1,6 @@
 import hashlib
+import secrets
+import time
 from utils.db import get_db_connection, init_db
 
 # Initialize DB on import
@@ -67,6 +69,95 @@ def decrement_credits(username):
     conn.commit()
     conn.close()
 
+def consume_credit(username):
+    """Atomically takes one credit. Returns False if the user has none left."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("UPDATE users SET credits_left = credits_left - 1 WHERE username = ? AND credits_left > 0", (username,))
+    conn.commit()
+    taken = c.rowcount == 1
+    conn.close()
+    return taken
+
+def refund_credit(username):
+    """Give back a credit taken for a request that failed."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("UPDATE users SET credits_left = credits_left + 1 WHERE username = ?", (username,))
+    conn.commit()
+    conn.close()
+
+def hash_api_key(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+def create_api_key(username, label=""):
+    """Create an API key for a user. The raw key is returned once; only its hash is stored."""
+    api_key = "hk_" + secrets.token_urlsafe(32)
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(
+        "INSERT INTO api_keys (key_hash, username, label, created_at) VALUES (?, ?, ?, ?)",
+        (hash_api_key(api_key), username, label, time.time())
+    )
+    conn.commit()
+    conn.close()
+    return api_key
+
+def revoke_api_keys(username):
+    """Revoke all of a user's API keys. Returns how many were revoked."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("UPDATE api_keys SET revoked = 1 WHERE username = ? AND revoked = 0", (username,))
+    conn.commit()
+    count = c.rowcount
+    conn.close()
+    return count
+
+def count_api_keys(username):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM api_keys WHERE username = ? AND revoked = 0", (username,))
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+def get_user_by_api_key(api_key):
+    """Returns the user dict owning an active API key, or None."""
+    if not api_key:
+        return None
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("""
+        SELECT u.* FROM api_keys k JOIN users u ON u.username = k.username
+        WHERE k.key_hash = ? AND k.revoked = 0
+    """, (hash_api_key(api_key),))
+    user = c.fetchone()
+    conn.close()
+    return dict(user) if user else None
+
+def namespace_owner(namespace):
+    """Username that created a topics namespace, or None if nobody has claimed it."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT owner FROM topic_namespaces WHERE namespace = ?", (namespace,))
+    row = c.fetchone()
+    conn.close()
+    return row["owner"] if row else None
+
+def claim_namespace(namespace, username):
+    """Makes username the namespace's owner unless it already has one. Returns True if username owns it."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(
+        "INSERT OR IGNORE INTO topic_namespaces (namespace, owner, created_at) VALUES (?, ?, ?)",
+        (namespace, username, time.time())
+    )
+    conn.commit()
+    c.execute("SELECT owner FROM topic_namespaces WHERE namespace = ?", (namespace,))
+    owner = c.fetchone()["owner"]
+    conn.close()
+    return owner == username
+
 def create_owner_account():
     """Ensure the owner account exists with admin privileges."""
     conn = get_db_connection()
@@ -0,0 +1,313 @@
+"""
+Pluggable vector search backends behind retrieve_relevant_topics.
+
+Small topic corpora (a few thousand 384-d chunks) are searched fastest by a
+single matrix multiply over a memory-mapped embedding matrix; Chroma's
+HNSW index stays the backend for large corpora.
+"""
+from abc import ABC, abstractmethod
+import json
+import mmap
+import os
+import uuid
+
+import numpy as np
+
+from utils.embeddings import EMBEDDING_DIM
+
+# Corpora up to this many chunks are served by the NumPy backend
+NUMPY_MAX_CHUNKS = int(os.environ.get("NUMPY_MAX_CHUNKS", "20000"))
+
+# Storage for the NumPy scan matrix: float32, float16 (2x smaller) or int8 (4x smaller)
+INDEX_DTYPES = ("float32", "float16", "int8")
+INDEX_DTYPE = os.environ.get("TOPICS_INDEX_DTYPE", "float32")
+
+# Keep float32 rows on disk to rescore quantized candidates exactly.
+# Turn off to save disk as well as memory, at a small recall cost.
+INDEX_RESCORE = os.environ.get("TOPICS_INDEX_RESCORE", "1") not in ("0", "false", "False")
+RESCORE_FACTOR = 4
+
+_SCAN_BLOCK = 4096
+
+
+class RetrieverBackend(ABC):
+    """Interface for vector search over one topics collection."""
+
+    name = "base"
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    @abstractmethod
+    def search(self, query_embedding, k=5):
+        """Returns up to k (text, cosine similarity) pairs, most similar first."""
+
+
+class ChromaBackend(RetrieverBackend):
+    """HNSW search through a LangChain Chroma vector store."""
+
+    name = "chroma"
+
+    def __init__(self, vectordb):
+        self.vectordb = vectordb
+        self.space = _distance_space(vectordb._collection)
+
+    def __len__(self):
+        return self.vectordb._collection.count()
+
+    def search(self, query_embedding, k=5):
+        # Chroma returns distances (lower is closer); convert to the cosine
+        # similarity NumpyBackend returns. MiniLM vectors are normalized, so
+        # squared L2 distance is 2 - 2*cos and cosine/ip distance is 1 - cos.
+        results = self.vectordb.similarity_search_by_vector_with_relevance_scores(
+            list(map(float, query_embedding)), k=k
+        )
+        scale = 0.5 if self.space == "l2" else 1.0
+        return [(doc.page_content, 1.0 - scale * distance) for doc, distance in results]
+
+
+def _distance_space(collection):
+    """The collection's HNSW distance function: "l2" (Chroma's default), "cosine" or "ip"."""
+    configuration = getattr(collection, "configuration_json", None) or {}
+    space = (configuration.get("hnsw") or {}).get("space")
+    return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def _numpy_paths(directory, name):
+    base = os.path.join(directory, name)
+    return {
+        "meta": f"{base}.json",
+        "vectors": f"{base}.vectors",
+        "quantized": f"{base}.quantized",
+        "scales": f"{base}.scales",
+        "texts": f"{base}.texts",
+        "offsets": f"{base}.offsets.npy",
+    }
+
+
+def quantize(vectors, dtype):
+    """
+    Compresses float32 rows to `dtype`. Returns (quantized, scales); scales
+    is None except for int8, which uses one symmetric scale per vector.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    raise ValueError(f"Unsupported index dtype '{dtype}'. Use one of: {', '.join(INDEX_DTYPES)}")
+
+
+class NumpyIndexWriter:
+    """
+    Streams embeddings and texts to disk for the NumPy backend.
+    Files are written under temporary names and published on close(),
+    with the metadata file last, so readers never see a partial index.
+
+    With a quantized dtype the scan matrix is stored as int8/float16; the
+    float32 copy is kept only if `keep_float32` (used for exact rescoring).
+    """
+
+    def __init__(self, directory, name, dim=EMBEDDING_DIM, dtype=None, keep_float32=None):
+        os.makedirs(directory, exist_ok=True)
+        self.paths = _numpy_paths(directory, name)
+        self.dim = dim
+        self.dtype = dtype or INDEX_DTYPE
+        if self.dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unsupported index dtype '{self.dtype}'. Use one of: {', '.join(INDEX_DTYPES)}")
+        self.keep_float32 = self.dtype == "float32" or (INDEX_RESCORE if keep_float32 is None else keep_float32)
+        self.count = 0
+        self._offsets = [0]
+        # Unique per writer, so two writers for the same name never share temp files
+        self._suffix = f".{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+        self._files = {"texts": open(self._tmp("texts"), "wb")}
+        if self.keep_float32:
+            self._files["vectors"] = open(self._tmp("vectors"), "wb")
+        if self.dtype != "float32":
+            self._files["quantized"] = open(self._tmp("quantized"), "wb")
+        if self.dtype == "int8":
+            self._files["scales"] = open(self._tmp("scales"), "wb")
+
+    def _tmp(self, key):
+        return self.paths[key] + self._suffix
+
+    def add(self, texts, embeddings):
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        if self.keep_float32:
+            self._files["vectors"].write(vectors.tobytes())
+        if self.dtype != "float32":
+            quantized, scales = quantize(vectors, self.dtype)
+            self._files["quantized"].write(quantized.tobytes())
+            if scales is not None:
+                self._files["scales"].write(scales.tobytes())
+        for text in texts:
+            encoded = text.encode("utf-8")
+            self._files["texts"].write(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+        self.count += len(texts)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        with open(self._tmp("offsets"), "wb") as f:
+            np.save(f, np.asarray(self._offsets, dtype=np.int64))
+        for key in self._files:
+            os.replace(self._tmp(key), self.paths[key])
+        os.replace(self._tmp("offsets"), self.paths["offsets"])
+        # Drop files a previous build with different settings may have left
+        for key in ("vectors", "quantized", "scales"):
+            if key not in self._files and os.path.exists(self.paths[key]):
+                os.remove(self.paths[key])
+        tmp_meta = self._tmp("meta")
+        with open(tmp_meta, "w") as f:
+            json.dump({
+                "count": self.count,
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "has_float32": self.keep_float32,
+            }, f)
+        os.replace(tmp_meta, self.paths["meta"])
+        return self.count
+
+    def abort(self):
+        for key, f in self._files.items():
+            f.close()
+            if os.path.exists(self._tmp(key)):
+                os.remove(self._tmp(key))
+
+
+def remove_numpy_index(directory, name):
+    for path in _numpy_paths(directory, name).values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def export_numpy_index(vectordb, directory, name, dtype=None, keep_float32=None):
+    """Writes the NumPy sidecar for an existing Chroma collection."""
+    data = vectordb.get(include=["documents", "embeddings"])
+    writer = NumpyIndexWriter(directory, name, dtype=dtype, keep_float32=keep_float32)
+    try:
+        if len(data["documents"]):
+            writer.add(data["documents"], data["embeddings"])
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+
+class NumpyBackend(RetrieverBackend):
+    """
+    Exact brute-force search: one mat-vec product over a memory-mapped
+    embedding matrix, top-k via argpartition. Texts are sliced lazily
+    from a memory-mapped sidecar using an offsets array.
+
+    For a quantized matrix, the int8/float16 scan picks the top
+    k * RESCORE_FACTOR candidates, which are then rescored exactly against
+    the float32 rows (only those rows of the float32 mmap are read).
+    """
+
+    name = "numpy"
+
+    def __init__(self, vectors, offsets, texts_buffer, quantized=None, scales=None):
+        self.vectors = vectors
+        self.quantized = quantized
+        self.scales = scales
+        self.offsets = offsets
+        self._texts = texts_buffer
+
+    @classmethod
+    def load(cls, directory, name):
+        """Opens a sidecar index, or returns None if there isn't a complete one."""
+        paths = _numpy_paths(directory, name)
+        if not os.path.exists(paths["meta"]):
+            return None
+        with open(paths["meta"]) as f:
+            meta = json.load(f)
+        count, dim = meta["count"], meta["dim"]
+        dtype = meta.get("dtype", "float32")
+        has_float32 = meta.get("has_float32", True)
+        if count == 0:
+            return cls(np.zeros((0, dim), dtype=np.float32), np.zeros(1, dtype=np.int64), b"")
+
+        vectors = quantized = scales = None
+        if has_float32:
+            vectors = np.memmap(paths["vectors"], dtype=np.float32, mode="r", shape=(count, dim))
+        if dtype != "float32":
+            quantized = np.memmap(paths["quantized"], dtype=np.dtype(dtype), mode="r", shape=(count, dim))
+        if dtype == "int8":
+            scales = np.fromfile(paths["scales"], dtype=np.float32, count=count)
+        offsets = np.load(paths["offsets"], mmap_mode="r")
+        with open(paths["texts"], "rb") as f:
+            texts_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(vectors, offsets, texts_buffer, quantized=quantized, scales=scales)
+
+    def __len__(self):
+        matrix = self.vectors if self.quantized is None else self.quantized
+        return matrix.shape[0]
+
+    @property
+    def dtype(self):
+        return "float32" if self.quantized is None else str(self.quantized.dtype)
+
+    def scan_bytes(self):
+        """Bytes of the matrix scanned on every query (the hot working set)."""
+        if self.quantized is None:
+            return self.vectors.nbytes
+        return self.quantized.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def text(self, i):
+        return self._texts[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def _approximate_scores(self, query):
+        scores = np.empty(len(self), dtype=np.float32)
+        # Blocked so the float32 upcast of the quantized matrix stays small
+        for start in range(0, len(self), _SCAN_BLOCK):
+            block = self.quantized[start:start + _SCAN_BLOCK].astype(np.float32)
+            scores[start:start + _SCAN_BLOCK] = block @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search(self, query_embedding, k=5):
+        n = len(self)
+        if n == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        k = min(k, n)
+
+        if self.quantized is None:
+            scores = self.vectors @ query
+            candidates = _top_k(scores, k)
+        else:
+            scores = self._approximate_scores(query)
+            candidates = _top_k(scores, min(n, k * RESCORE_FACTOR))
+            if self.vectors is not None:
+                candidates = np.sort(candidates)  # sequential reads from the mmap
+                exact = self.vectors[candidates] @ query
+                scores = np.zeros(n, dtype=np.float32)
+                scores[candidates] = exact
+            candidates = candidates[np.argsort(-scores[candidates])][:k]
+
+        return [(self.text(i), float(scores[i])) for i in candidates]
+
+
+def _top_k(scores, k):
+    """Indices of the k highest scores, best first."""
+    n = scores.shape[0]
+    top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+    return top[np.argsort(-scores[top])]
+
+
+def select_backend(vectordb, numpy_dir, name):
+    """
+    Chooses the backend for a collection by corpus size: the NumPy sidecar
+    when present and small enough, otherwise Chroma.
+    """
+    backend = NumpyBackend.load(numpy_dir, name)
+    if backend is not None and len(backend) <= NUMPY_MAX_CHUNKS:
+        return backend
+    return ChromaBackend(vectordb)
@@ -0,0 +1,137 @@
+"""
+Content-addressed cache for generated artifacts (docs, keywords, GitHub results).
+
+Two tiers: the Streamlit session (instant re-renders on widget reruns) and
+a shared SQLite table next to `users`, so any session asking for the same
+idea gets the stored result without paying for another LLM call.
+"""
+import hashlib
+import json
+import os
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.db import get_db_connection, init_db
+from utils.usage import record_usage
+
+# Bump when prompts/models change so stale artifacts stop matching
+CACHE_VERSION = "v1"
+
+ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_MB", "50")) * 1024 * 1024
+ARTIFACT_CACHE_TTL = int(os.environ.get("ARTIFACT_CACHE_TTL_DAYS", "7")) * 24 * 3600
+
+# Don't rewrite last_access on every read; once a minute is plenty for LRU
+_TOUCH_INTERVAL = 60
+
+_SESSION_KEY = "artifact_cache"
+
+init_db()
+
+
+def artifact_key(kind, *parts):
+    """Hash of the artifact kind, cache version and its inputs."""
+    payload = json.dumps([CACHE_VERSION, kind, *parts], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def idea_key(idea, kind="content"):
+    """Key for an artifact derived from a parsed idea."""
+    return artifact_key(kind, idea.get("title", ""), idea.get("summary", ""), idea.get("tech_stack", ""))
+
+
+def _session_tier():
+    # Outside a Streamlit session (API, batch runner): shared tier only
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    try:
+        if _SESSION_KEY not in st.session_state:
+            st.session_state[_SESSION_KEY] = {}
+        return st.session_state[_SESSION_KEY]
+    except Exception:
+        return None
+
+
+def session_artifacts():
+    """
+    This session's artifact dict, or None outside Streamlit. Callers may keep
+    the reference and read it later from another thread (e.g. a deferred download).
+    """
+    return _session_tier()
+
+
+def get_artifact(key):
+    """Returns the cached value for key, or None."""
+    session = _session_tier()
+    if session is not None and key in session:
+        return session[key]
+
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT kind, value, last_access FROM artifacts WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row["last_access"] > _TOUCH_INTERVAL:
+            conn.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+    finally:
+        conn.close()
+
+    value = json.loads(row["value"])
+    # A shared-tier hit is a generation someone else already paid for
+    record_usage(row["kind"], cache_hit=True)
+    if session is not None:
+        session[key] = value
+    return value
+
+
+def put_artifact(key, kind, value):
+    """Stores a JSON-serialisable value in both tiers and evicts old entries."""
+    session = _session_tier()
+    if session is not None:
+        session[key] = value
+
+    encoded = json.dumps(value, ensure_ascii=False)
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO artifacts (key, kind, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, encoded, len(encoded.encode("utf-8")), now, now)
+        )
+        _evict(conn, now)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _evict(conn, now):
+    """Drops expired artifacts, then least recently used ones over the size budget."""
+    conn.execute("DELETE FROM artifacts WHERE last_access < ?", (now - ARTIFACT_CACHE_TTL,))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+    if total <= ARTIFACT_CACHE_MAX_BYTES:
+        return
+    freed = 0
+    victims = []
+    for row in conn.execute("SELECT key, size FROM artifacts ORDER BY last_access ASC"):
+        if total - freed <= ARTIFACT_CACHE_MAX_BYTES:
+            break
+        victims.append((row["key"],))
+        freed += row["size"]
+    conn.executemany("DELETE FROM artifacts WHERE key = ?", victims)
+
+
+def get_or_create_artifact(key, kind, create, is_valid=lambda value: True):
+    """
+    Returns (value, cache_hit). On a miss, calls create() and stores the
+    result if is_valid(value) - error results are never cached.
+    """
+    value = get_artifact(key)
+    if value is not None:
+        return value, True
+    value = create()
+    if is_valid(value):
+        put_artifact(key, kind, value)
+    return value, False
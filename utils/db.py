@@ -4,7 +4,7 @@ import os
 DB_NAME = "users.db"
 
 def init_db():
-    """Initialize the database with users table."""
+    """Initialize the database with users, API keys, topics ownership, generated-artifact cache and usage tables."""
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     c.execute('''
@@ -16,6 +16,47 @@ def init_db():
             is_admin BOOLEAN DEFAULT 0
         )
     ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS artifacts (
+            key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_last_access ON artifacts (last_access)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            username TEXT,
+            stage TEXT NOT NULL,
+            model TEXT,
+            prompt_tokens INTEGER DEFAULT 0,
+            completion_tokens INTEGER DEFAULT 0,
+            latency_ms REAL DEFAULT 0,
+            cache_hit INTEGER DEFAULT 0
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_usage_ts ON usage (ts)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS topic_namespaces (
+            namespace TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS api_keys (
+            key_hash TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            label TEXT,
+            created_at REAL NOT NULL,
+            revoked BOOLEAN DEFAULT 0
+        )
+    ''')
     conn.commit()
     conn.close()
 
@@ -0,0 +1,28 @@
+from utils.llm import chat_completion, get_api_key
+from utils.scheduler import SchedulerOverloaded
+
+DOCS_MODEL = "gpt-4o"
+
+
+def generate_project_docs(idea):
+    """
+    Writes project documentation (Overview ... Future) for a parsed idea
+    dict with 'title', 'summary' and 'tech_stack'.
+    """
+    try:
+        if not get_api_key():
+            return "⚠️ OpenAI API Key is missing. Please set it in Streamlit Secrets."
+
+        prompt = f"Generate project docs for: {idea['title']}. Summary: {idea['summary']}. Tech: {idea['tech_stack']}. Sections: Overview, Problem, Solution, Architecture, Requirements, Impact, Future."
+        resp = chat_completion(
+            stage="docs", model=DOCS_MODEL, messages=[
+                {"role": "system", "content": "You are a tech writer."},
+                {"role": "user", "content": prompt}
+            ], temperature=0.7
+        )
+        return resp.choices[0].message.content.strip()
+
+    except SchedulerOverloaded as e:
+        return f"⚠️ {str(e)}"
+    except Exception as e:
+        return f"❌ Error generating docs: {str(e)}"
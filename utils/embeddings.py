@@ -0,0 +1,120 @@
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import streamlit as st
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's sentence-transformers limit
+
+# After a failed model load, callers fail fast for this long instead of
+# retrying the download on every request
+EMBEDDINGS_RETRY_SECONDS = int(os.environ.get("EMBEDDINGS_RETRY_SECONDS", "300"))
+
+# Exported by `python -m scripts.export_onnx`
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+
+def get_embedding_backend():
+    """Configured embedder: 'torch' (sentence-transformers) or 'onnx'."""
+    try:
+        backend = st.secrets["embedding_backend"]
+    except:
+        backend = os.environ.get("EMBEDDING_BACKEND", "torch")
+    return backend.lower()
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 run by ONNX Runtime (int8-quantized export).
+    Mirrors the sentence-transformers pipeline: mean pooling over the
+    attention mask, then L2 normalisation. No PyTorch import needed.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, model_file=ONNX_MODEL_FILE, batch_size=32):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled / norms
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+def _load_torch_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=MODEL_NAME,
+        model_kwargs={'device': 'cpu'},  # Use CPU for compatibility
+        encode_kwargs={'normalize_embeddings': True}  # Normalize for better similarity
+    )
+
+
+_load_failure = None  # (monotonic time, exception) of the last failed load
+
+
+def get_embeddings():
+    """
+    Returns the process-wide MiniLM embedder.
+    Loaded once and shared by every session, collection and query.
+    Set EMBEDDING_BACKEND=onnx to use the exported ONNX model; falls back
+    to PyTorch if the export is missing.
+    A failed load (e.g. no network for the model download) is remembered
+    for EMBEDDINGS_RETRY_SECONDS, so callers go straight to their fallbacks.
+    """
+    global _load_failure
+    if _load_failure and time.monotonic() - _load_failure[0] < EMBEDDINGS_RETRY_SECONDS:
+        raise RuntimeError(f"Embedding model unavailable: {_load_failure[1]}")
+    try:
+        return _load_embeddings()
+    except Exception as e:
+        _load_failure = (time.monotonic(), e)
+        raise
+
+
+@st.cache_resource(show_spinner=False)
+def _load_embeddings():
+    if get_embedding_backend() == "onnx":
+        try:
+            return OnnxMiniLMEmbeddings()
+        except Exception as e:
+            logger.warning("ONNX embedder unavailable (%s); falling back to PyTorch.", e)
+    return _load_torch_embeddings()
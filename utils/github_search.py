@@ -0,0 +1,50 @@
+import streamlit as st
+import requests
+import os
+
+from utils.singleflight import SingleFlight, fingerprint
+
+# Identical concurrent searches share one request (and one unit of rate limit)
+_github_flight = SingleFlight()
+GITHUB_WAIT_TIMEOUT = 15
+
+
+def get_github_token():
+    try:
+        return st.secrets["github_token"]
+    except:
+        return os.environ.get("GITHUB_TOKEN")
+
+
+def _fetch_repos(url, headers):
+    resp = requests.get(url, headers=headers, timeout=10)
+    if resp.status_code != 200:
+        return []
+    return [{
+        "name": item.get("name"), "url": item.get("html_url"),
+        "description": item.get("description"), "stars": item.get("stargazers_count"),
+        "language": item.get("language")
+    } for item in resp.json().get("items", [])]
+
+
+def search_github_repos(keywords, per_page=5):
+    """
+    Searches GitHub for popular repositories matching comma-separated keywords.
+    Returns a list of {name, url, description, stars, language}; empty on any error.
+    """
+    try:
+        q = keywords.replace(',', ' ').strip()
+        url = f"https://api.github.com/search/repositories?q={q}+stars:>100&sort=stars&order=desc&per_page={per_page}"
+        headers = {"Accept": "application/vnd.github+json"}
+        token = get_github_token()
+        if token:
+            headers["Authorization"] = f"token {token}"
+        repos = _github_flight.do(
+            fingerprint("github", url, bool(token)),
+            lambda: _fetch_repos(url, headers),
+            timeout=GITHUB_WAIT_TIMEOUT
+        )
+        # Waiters share the leader's list; hand each caller its own copy
+        return [dict(repo) for repo in repos]
+    except:
+        return []
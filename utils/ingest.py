@@ -0,0 +1,196 @@
+"""
+Streaming document ingestion for the topics knowledge base.
+
+Text is pulled out of DOCX/PDF files one paragraph or page at a time,
+chunked incrementally and handed to the embedding stage in batches, so
+peak memory stays flat regardless of document size.
+"""
+import hashlib
+import os
+import queue
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+SUPPORTED_EXTENSIONS = (".docx", ".pdf")
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+EMBED_BATCH_SIZE = 64
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def iter_docx_paragraphs(path):
+    """Yield paragraph text from a DOCX file without loading the whole document."""
+    with zipfile.ZipFile(path) as zf:
+        with zf.open("word/document.xml") as xml_file:
+            depth = 0
+            body = None
+            for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if elem.tag == f"{_W}body":
+                        body = elem
+                    continue
+
+                depth -= 1
+                if elem.tag == f"{_W}p":
+                    parts = []
+                    for node in elem.iter():
+                        if node.tag == f"{_W}t" and node.text:
+                            parts.append(node.text)
+                        elif node.tag == f"{_W}tab":
+                            parts.append("\t")
+                        elif node.tag in (f"{_W}br", f"{_W}cr"):
+                            parts.append("\n")
+                    text = "".join(parts).strip()
+                    if text:
+                        yield text
+                    elem.clear()
+
+                # Drop finished top-level blocks (paragraphs, tables) from the tree
+                if depth == 2 and body is not None:
+                    body.clear()
+
+
+def iter_pdf_pages(path):
+    """Yield the text of each PDF page, one page at a time."""
+    from PyPDF2 import PdfReader
+
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        for page in reader.pages:
+            text = (page.extract_text() or "").strip()
+            if text:
+                yield text
+
+
+def iter_document_blocks(path):
+    """Yield text blocks (paragraphs or pages) from a supported document."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".docx":
+        return iter_docx_paragraphs(path)
+    if ext == ".pdf":
+        return iter_pdf_pages(path)
+    raise ValueError(f"Unsupported file type '{ext}'. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+def iter_chunks(blocks, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Chunk a stream of text blocks incrementally.
+
+    Blocks are buffered only until a few chunks' worth of text is available;
+    the trailing (possibly incomplete) chunk is carried into the next window.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    window = chunk_size * 8
+    buffer = ""
+
+    for block in blocks:
+        buffer = f"{buffer}\n\n{block}" if buffer else block
+        if len(buffer) < window:
+            continue
+        chunks = splitter.split_text(buffer)
+        for chunk in chunks[:-1]:
+            yield chunk
+        buffer = chunks[-1] if chunks else ""
+
+    if buffer.strip():
+        yield from splitter.split_text(buffer)
+
+
+def iter_batches(items, batch_size=EMBED_BATCH_SIZE):
+    """Group an iterable into lists of at most batch_size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_DONE = object()
+
+
+def prefetch(iterable, depth=2):
+    """
+    Run an iterator on a background thread, keeping up to `depth` items ready.
+
+    Lets extraction and chunking of the next batch overlap with embedding of
+    the current one. Exceptions from the producer are re-raised here.
+    """
+    q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Lets the producer exit if the consumer stops early
+        stop.set()
+
+
+def iter_document_batches(path, batch_size=EMBED_BATCH_SIZE):
+    """Stream a document as batches of chunks ready for embedding."""
+    return prefetch(iter_batches(iter_chunks(iter_document_blocks(path)), batch_size))
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_upload(data, path):
+    """
+    Writes uploaded bytes to path unless the file there already has the same
+    content. Returns (sha256, written). The write goes through a temp file so
+    a concurrent index build never reads a half-written document.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if os.path.exists(path) and file_sha256(path) == digest:
+        return digest, False
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest, True
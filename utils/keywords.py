@@ -0,0 +1,109 @@
+import streamlit as st
+import numpy as np
+import os
+import re
+
+from utils.lexical import STOPWORDS
+from utils.llm import chat_completion
+
+# Extra words that make poor search keywords on their own
+_FILLER = STOPWORDS | frozenset("""
+project projects idea ideas app application system platform solution solutions tool
+tools build building help helps allow allows provide provides based new also may
+make makes using used user users real time around across within without into like
+over under about between through per each any all more most other
+""".split())
+
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#.\-]*[A-Za-z0-9+#]|[A-Za-z0-9]")
+
+
+def get_keyword_method():
+    """Configured extractor: 'local' (embeddings, no network) or 'llm'."""
+    try:
+        method = st.secrets["keyword_extractor"]
+    except:
+        method = os.environ.get("KEYWORD_EXTRACTOR", "local")
+    return method.lower()
+
+
+def candidate_phrases(text, max_words=3):
+    """
+    Contiguous 1-3 word phrases that don't start or end on a filler word
+    and never cross punctuation. Original casing is kept ("LoRaWAN", "RAG").
+    """
+    candidates = {}
+    for segment in re.split(r"[,;:!?()\[\]{}|/\n\"]+|\.(?:\s+|$)", text):
+        words = _WORD_RE.findall(segment)
+        for i in range(len(words)):
+            for n in range(1, max_words + 1):
+                phrase_words = words[i:i + n]
+                if len(phrase_words) < n:
+                    break
+                if phrase_words[0].lower() in _FILLER or phrase_words[-1].lower() in _FILLER:
+                    continue
+                if n == 1 and (len(phrase_words[0]) < 3 or phrase_words[0].isdigit()):
+                    continue
+                phrase = " ".join(phrase_words)
+                candidates.setdefault(phrase.lower(), phrase)
+    return list(candidates.values())
+
+
+def extract_keywords_local(text, top_n=5, diversity=0.5):
+    """
+    KeyBERT-style extraction with the already-loaded MiniLM embedder:
+    candidate phrases are ranked by similarity to the whole text, with
+    maximal marginal relevance so the picks don't repeat each other.
+    """
+    from utils.embeddings import get_embeddings
+
+    candidates = candidate_phrases(text)
+    if not candidates:
+        return []
+
+    vectors = np.asarray(get_embeddings().embed_documents([text] + candidates), dtype=np.float32)
+    doc_vector, phrase_vectors = vectors[0], vectors[1:]
+    relevance = phrase_vectors @ doc_vector
+
+    selected = [int(np.argmax(relevance))]
+    while len(selected) < min(top_n, len(candidates)):
+        redundancy = (phrase_vectors @ phrase_vectors[selected].T).max(axis=1)
+        mmr = (1 - diversity) * relevance - diversity * redundancy
+        mmr[selected] = -np.inf
+        selected.append(int(np.argmax(mmr)))
+
+    return [candidates[i] for i in selected]
+
+
+def extract_keywords_llm(text):
+    """Asks gpt-4o-mini for 3-5 comma-separated keywords."""
+    response = chat_completion(
+        stage="keywords",
+        model="gpt-4o-mini",
+        messages=[{"role": "system", "content": "Extract 3-5 keywords, comma-separated."},
+                  {"role": "user", "content": f"Extract from: {text}"}],
+        temperature=0.3, max_tokens=50
+    )
+    return response.choices[0].message.content.strip()
+
+
+def extract_keywords(text, method=None, llm_fallback=True, top_n=5):
+    """
+    Returns 3-5 comma-separated keywords for the text.
+    The local extractor needs no network and answers in milliseconds; the
+    LLM is used if configured, or as a fallback when local extraction fails.
+    """
+    method = method or get_keyword_method()
+
+    if method == "local":
+        try:
+            keywords = extract_keywords_local(text, top_n=top_n)
+            if len(keywords) >= 3 or not llm_fallback:
+                return ", ".join(keywords) if keywords else text[:50]
+        except Exception:
+            if not llm_fallback:
+                return text[:50]
+
+    try:
+        return extract_keywords_llm(text)
+    except:
+        return text[:50]
@@ -0,0 +1,106 @@
+"""
+BM25 inverted index for exact-term topic matching.
+
+MiniLM embeddings match acronyms and product names ("RAG", "LoRaWAN")
+poorly, so the retriever fuses these lexical hits with vector results.
+"""
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or
+such that the their then there these they this to was were will with can
+should using use via e g etc which who what when where how
+""".split())
+
+
+def tokenize(text):
+    """Lowercased word tokens with stopwords removed; keeps c++ / c# intact."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    """
+    Fuses several ranked lists of keys into one ranking.
+    Each key scores sum(1 / (k + rank)) over the lists it appears in.
+    """
+    scores = defaultdict(float)
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked):
+            scores[key] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 over an append-only list of documents."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = []
+        self.doc_lens = []
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add_documents(self, texts):
+        """Index more documents. Safe to call repeatedly while a corpus streams in."""
+        for text in texts:
+            doc_id = len(self.docs)
+            tokens = tokenize(text)
+            self.docs.append(text)
+            self.doc_lens.append(len(tokens))
+            self._total_len += len(tokens)
+            for term, tf in Counter(tokens).items():
+                self.postings[term][doc_id] = tf
+
+    def search(self, query, k=5):
+        """Returns up to k (text, score) pairs, best first."""
+        n = len(self.docs)
+        if n == 0:
+            return []
+        avgdl = self._total_len / n or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[doc_id], score) for doc_id, score in best]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "docs": self.docs,
+                "doc_lens": self.doc_lens,
+                "postings": self.postings,
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.docs = data["docs"]
+        index.doc_lens = data["doc_lens"]
+        index._total_len = sum(index.doc_lens)
+        for term, postings in data["postings"].items():
+            index.postings[term] = {int(doc_id): tf for doc_id, tf in postings.items()}
+        return index
@@ -0,0 +1,76 @@
+"""
+Shared OpenAI access for every pipeline stage.
+
+All chat completions go through chat_completion(), which coalesces
+identical concurrent requests so a classroom pressing Generate at once
+costs one upstream call, and admits each upstream call through the
+shared scheduler (concurrency cap, token budget, fair queuing).
+"""
+import streamlit as st
+from openai import OpenAI
+import os
+import threading
+import time
+
+from utils.scheduler import estimate_tokens, get_scheduler
+from utils.singleflight import SingleFlight, fingerprint
+from utils.usage import record_completion, record_usage
+
+# How long a coalesced caller waits for the in-flight request
+LLM_WAIT_TIMEOUT = float(os.environ.get("LLM_WAIT_TIMEOUT", "120"))
+
+_llm_flight = SingleFlight()
+_client_lock = threading.Lock()
+_clients = {}
+
+
+def get_api_key():
+    try:
+        return st.secrets["openai_api_key"]
+    except:
+        return os.environ.get("OPENAI_API_KEY")
+
+
+def get_openai_client():
+    """Process-wide OpenAI client (thread-safe, reuses its connection pool)."""
+    api_key = get_api_key()
+    if not api_key:
+        return None
+    with _client_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OpenAI(api_key=api_key)
+        return _clients[api_key]
+
+
+def chat_completion(model, messages, stage="llm", **params):
+    """
+    Calls chat.completions.create, sharing one upstream call between
+    concurrent callers whose model, messages and params are identical.
+    Tokens and latency are recorded under `stage` for the current user;
+    callers served by someone else's in-flight call are recorded as cache hits.
+    """
+    client = get_openai_client()
+    if client is None:
+        raise RuntimeError("OpenAI API Key is missing. Please set it in Streamlit Secrets.")
+
+    started = time.perf_counter()
+    upstream = []
+
+    def call():
+        upstream.append(True)
+        with get_scheduler().slot(estimate_tokens(messages, params.get("max_tokens"))) as ticket:
+            response = client.chat.completions.create(model=model, messages=messages, **params)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                ticket.used_tokens = usage.total_tokens
+            return response
+
+    key = fingerprint("chat", model, messages, params)
+    response = _llm_flight.do(key, call, timeout=LLM_WAIT_TIMEOUT)
+
+    latency = time.perf_counter() - started
+    if upstream:
+        record_completion(stage, model, response, latency)
+    else:
+        record_usage(stage, model=model, latency=latency, cache_hit=True)
+    return response
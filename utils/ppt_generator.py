@@ -1,39 +1,105 @@
 from pptx import Presentation
+from functools import lru_cache
+import io
 import os
 import re
+import zipfile
 
-def create_ppt(topic, repos):
-    # Clean topic for safe filename
+# Optional custom base template; python-pptx's default is used if absent
+TEMPLATE_PATH = os.environ.get("PPT_TEMPLATE_PATH", "data/template.pptx")
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+@lru_cache(maxsize=1)
+def _template_bytes():
+    """Base template, read (or generated) once per process and reused for every deck."""
+    if os.path.exists(TEMPLATE_PATH):
+        with open(TEMPLATE_PATH, "rb") as f:
+            return f.read()
+    buffer = io.BytesIO()
+    Presentation().save(buffer)
+    return buffer.getvalue()
+
+
+def _new_presentation():
+    return Presentation(io.BytesIO(_template_bytes()))
+
+
+def safe_filename(topic, max_len=60):
+    """Clean a topic for use as a filename."""
     safe_topic = re.sub(r'[\\/*?:"<>|\n\r]+', "_", topic.strip())
-    if len(safe_topic) > 60:
-        safe_topic = safe_topic[:60]
+    return safe_topic[:max_len] or "idea"
+
+
+def _repo_lines(repos):
+    if not repos:
+        return "No related repositories found."
+    return "\n".join([f"- {r['name']}: {r.get('url') or r.get('html_url', '')}" for r in repos[:5]])
+
 
-    prs = Presentation()
+def add_idea_slides(prs, idea, repos=None):
+    """Append title, overview, tech stack and repository slides for one idea."""
+    lines = (idea.get("title") or "").strip().splitlines()
+    title = lines[0] if lines else "Untitled"
 
     # Slide 1: Title
     slide = prs.slides.add_slide(prs.slide_layouts[0])
-    slide.shapes.title.text = f"Hackathon Project: {topic.splitlines()[0]}"
+    slide.shapes.title.text = f"Hackathon Project: {title}"
     slide.placeholders[1].text = "Generated by Hackathon Idea Generator"
 
     # Slide 2: Overview
     slide = prs.slides.add_slide(prs.slide_layouts[1])
     slide.shapes.title.text = "Overview"
-    slide.placeholders[1].text = (
-        f"This project '{topic.splitlines()[0]}' aims to address real-world hackathon challenges "
+    slide.placeholders[1].text = idea.get("summary") or (
+        f"This project '{title}' aims to address real-world hackathon challenges "
         "by integrating AI-driven insights and open-source resources."
     )
 
-    # Slide 3: Repositories
+    # Slide 3: Tech Stack
+    if idea.get("tech_stack"):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = "Tech Stack"
+        slide.placeholders[1].text = "\n".join(t.strip() for t in idea["tech_stack"].split(",") if t.strip())
+
+    # Slide 4: Repositories
     slide = prs.slides.add_slide(prs.slide_layouts[1])
     slide.shapes.title.text = "Related Repositories"
-    if repos:
-        content = "\n".join([f"- {r['name']}: {r['html_url']}" for r in repos[:5]])
-    else:
-        content = "No related repositories found."
-    slide.placeholders[1].text = content
-
-    # Save PPT
-    os.makedirs("generated_ppts", exist_ok=True)
-    ppt_path = os.path.join("generated_ppts", f"{safe_topic}.pptx")
-    prs.save(ppt_path)
-    return ppt_path
+    slide.placeholders[1].text = _repo_lines(repos)
+
+
+def build_deck(ideas, repos_by_title=None):
+    """Render one deck covering all ideas into an in-memory BytesIO."""
+    repos_by_title = repos_by_title or {}
+    prs = _new_presentation()
+
+    if len(ideas) > 1:
+        slide = prs.slides.add_slide(prs.slide_layouts[0])
+        slide.shapes.title.text = "Hackathon Project Ideas"
+        slide.placeholders[1].text = "\n".join(f"{i + 1}. {idea['title']}" for i, idea in enumerate(ideas))
+
+    for idea in ideas:
+        add_idea_slides(prs, idea, repos_by_title.get(idea["title"]))
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def build_deck_zip(ideas, repos_by_title=None):
+    """Render one deck per idea and bundle them into an in-memory zip."""
+    repos_by_title = repos_by_title or {}
+    buffer = io.BytesIO()
+    # .pptx files are already deflated; storing avoids recompressing them
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i, idea in enumerate(ideas):
+            deck = build_deck([idea], repos_by_title)
+            zf.writestr(f"{i + 1:02d}_{safe_filename(idea['title'])}.pptx", deck.getvalue())
+    buffer.seek(0)
+    return buffer
+
+
+def create_ppt(topic, repos):
+    """Single-topic deck as an in-memory BytesIO (nothing is written to disk)."""
+    return build_deck([{"title": topic, "summary": "", "tech_stack": ""}], {topic: repos})
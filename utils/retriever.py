@@ -1,166 +1,469 @@
-import docx2txt
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import chromadb
+from chromadb.config import Settings
 import streamlit as st
+import hashlib
+import logging
 import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
 
 import tempfile
 
-def create_vector_db(docx_path, persist_directory=None):
-    if persist_directory is None:
-        # Use timestamped path to ensure fresh DB every time
-        import time
-        timestamp = int(time.time())
-        persist_directory = os.path.join(tempfile.gettempdir(), f"chroma_db_{timestamp}")
-    
+from utils.backends import (
+    NUMPY_MAX_CHUNKS, NumpyIndexWriter, export_numpy_index, remove_numpy_index, select_backend
+)
+from utils.embeddings import get_embeddings, EMBEDDING_DIM
+from utils.ingest import iter_document_batches
+from utils.lexical import BM25Index, reciprocal_rank_fusion
+from utils.warm_index import WarmIndexError, load_warm_index
+
+logger = logging.getLogger(__name__)
+
+# Writable store holding one collection per tenant (user or event)
+TOPICS_DB_DIR = os.environ.get("TOPICS_DB_DIR", os.path.join(tempfile.gettempdir(), "chroma_db"))
+
+# Shipped global index, used read-only when a tenant has no topics of its own
+DEFAULT_DB_DIR = "vectorstore/chroma_db"
+DEFAULT_COLLECTION = "hackathon_topics"
+
+# Memory budget for loaded tenant collections before idle ones are evicted
+COLLECTION_MEMORY_LIMIT = int(os.environ.get("TOPICS_MEMORY_LIMIT_MB", "256")) * 1024 * 1024
+COLLECTION_IDLE_SECONDS = int(os.environ.get("TOPICS_IDLE_SECONDS", "1800"))
+
+# Rough per-chunk footprint: float32 vector + HNSW links + text (+ its BM25 postings)
+_BYTES_PER_CHUNK = EMBEDDING_DIM * 4 + 256 + 600 * 2
+
+# Private per-user namespaces; any other namespace is a shared event code
+USER_NAMESPACE_PREFIX = "user:"
+
+# Candidates taken from each retriever before reciprocal rank fusion
+HYBRID_CANDIDATE_FACTOR = 2
+
+
+def user_namespace(username):
+    """A user's private topics namespace; shared event codes can't take this form."""
+    return f"{USER_NAMESPACE_PREFIX}{username}"
+
+
+def namespace_for(username, event_code=None):
+    """
+    The namespace a user's searches and uploads go to: their private one,
+    or a shared event code. Returns None for another user's private namespace.
+    """
+    event_code = (event_code or "").strip()
+    if not event_code:
+        return user_namespace(username)
+    if event_code.startswith(USER_NAMESPACE_PREFIX) and event_code != user_namespace(username):
+        return None
+    return event_code
+
+
+def collection_name_for(namespace):
     """
-    Creates a vector database from a DOCX file using LangChain and Chroma.
+    Maps a user/event namespace to a valid Chroma collection name.
+    The hash suffix keeps names unique after slugging.
     """
+    slug = re.sub(r"[^a-z0-9]+", "-", namespace.lower()).strip("-")[:40] or "tenant"
+    digest = hashlib.sha1(namespace.encode()).hexdigest()[:8]
+    return f"topics_{slug}_{digest}"
+
+
+def bm25_path(collection_name, base_dir=None):
+    """Where the BM25 index for a collection is stored, next to its Chroma files."""
+    return os.path.join(base_dir or TOPICS_DB_DIR, "bm25", f"{collection_name}.json")
+
+
+def numpy_dir(base_dir=None):
+    """Directory holding NumPy backend sidecars, next to the Chroma files."""
+    return os.path.join(base_dir or TOPICS_DB_DIR, "numpy")
+
+
+def load_bm25(vectordb, path):
+    """
+    Loads a collection's BM25 index, rebuilding it from the stored chunks
+    if it is missing (e.g. indexes built before hybrid retrieval existed).
+    """
+    if os.path.exists(path):
+        try:
+            return BM25Index.load(path)
+        except Exception:
+            pass
+    index = BM25Index()
+    index.add_documents(vectordb.get(include=["documents"])["documents"])
     try:
-        # FORCE CLEAN START - Delete any existing database
-        if os.path.exists(persist_directory):
-            try:
-                shutil.rmtree(persist_directory)
-                import time
-                time.sleep(0.5)  # Give filesystem time to release
-            except Exception as e:
-                st.warning(f"Cleaning old DB: {e}")
-        
-        # 1. Extract text from DOCX
-        text = docx2txt.process(docx_path)
-        
-        if not text or len(text.strip()) == 0:
-            st.error("❌ No text found in the document.")
+        index.save(path)
+    except OSError:
+        pass
+    return index
+
+
+class TopicIndex:
+    """A searchable topics collection: a vector backend plus its BM25 index."""
+
+    def __init__(self, vectordb, backend, lexical):
+        self.vectordb = vectordb
+        self.backend = backend
+        self.lexical = lexical
+
+    def __len__(self):
+        return len(self.lexical)
+
+
+def open_topic_index(vectordb, name, base_dir=None):
+    """
+    Wraps a Chroma collection with its search backend and BM25 index.
+    Sidecars missing for small collections are exported on first open.
+    Returns None while the collection is being rebuilt: it is incomplete,
+    and its sidecars and BM25 index are about to be replaced.
+    """
+    if _is_building(name, base_dir):
+        return None
+    lexical = load_bm25(vectordb, bm25_path(name, base_dir))
+    sidecars = numpy_dir(base_dir)
+    if len(lexical) <= NUMPY_MAX_CHUNKS and not os.path.exists(os.path.join(sidecars, f"{name}.json")):
+        try:
+            export_numpy_index(vectordb, sidecars, name)
+        except Exception:
+            pass
+    return TopicIndex(vectordb, select_backend(vectordb, sidecars, name), lexical)
+
+
+@st.cache_resource(show_spinner=False)
+def get_chroma_client():
+    """Single Chroma client shared by all tenant collections."""
+    os.makedirs(TOPICS_DB_DIR, exist_ok=True)
+    return chromadb.PersistentClient(
+        path=TOPICS_DB_DIR,
+        settings=Settings(
+            anonymized_telemetry=False,
+            # Let Chroma unload HNSW segments of idle collections under the same budget
+            chroma_segment_cache_policy="LRU",
+            chroma_memory_limit_bytes=COLLECTION_MEMORY_LIMIT,
+        ),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_warm_index():
+    """
+    Prebuilt index from scripts/build_index.py, opened read-only and
+    memory-mapped. None if it isn't shipped or fails verification, in which
+    case retrieval falls back to the shipped Chroma index.
+    """
+    try:
+        loaded = load_warm_index()
+    except WarmIndexError as e:
+        logger.warning("Ignoring warm index: %s", e)
+        return None
+    if loaded is None:
+        return None
+    backend, lexical, _ = loaded
+    return TopicIndex(None, backend, lexical)
+
+
+@st.cache_resource(show_spinner=False)
+def get_default_index():
+    """
+    Global default index shipped with the app, opened read-only.
+    Chroma touches its files even on reads, so a private copy is opened
+    and the shipped directory is never modified.
+    """
+    if not os.path.exists(DEFAULT_DB_DIR):
+        return None
+    working_copy = os.path.join(tempfile.gettempdir(), "chroma_default_readonly")
+    if not os.path.exists(working_copy):
+        shutil.copytree(DEFAULT_DB_DIR, working_copy)
+    vectordb = Chroma(
+        persist_directory=working_copy,
+        embedding_function=get_embeddings(),
+        collection_name=DEFAULT_COLLECTION
+    )
+    return open_topic_index(vectordb, DEFAULT_COLLECTION, working_copy)
+
+
+class CollectionRegistry:
+    """
+    LRU of opened tenant collections, bounded by an estimated memory budget.
+    Collections idle longer than `idle_seconds` are dropped on the next access.
+    """
+
+    def __init__(self, max_bytes=COLLECTION_MEMORY_LIMIT, idle_seconds=COLLECTION_IDLE_SECONDS):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()  # name -> [TopicIndex, est_bytes, last_used]
+        self._lock = threading.Lock()
+
+    def get(self, namespace):
+        """Returns the tenant's TopicIndex, or None if it has no topics or is being rebuilt."""
+        name = collection_name_for(namespace)
+        if _is_building(name):
             return None
-        
-        # 2. Split into chunks
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500, 
-            chunk_overlap=50,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        chunks = splitter.split_text(text)
-        
-        if not chunks:
-            st.error("❌ No chunks created from the document.")
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry:
+                entry[2] = time.time()
+                self._entries.move_to_end(name)
+                self._evict()
+                return entry[0]
+
+        client = get_chroma_client()
+        try:
+            count = client.get_collection(name).count()
+        except Exception:
             return None
-        
-        st.info(f"📄 Processing {len(chunks)} text chunks...")
-        
-        # 3. Create embeddings (using lightweight model)
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},  # Use CPU for compatibility
-            encode_kwargs={'normalize_embeddings': True}  # Normalize for better similarity
-        )
-        
-        # 4. Create directory if it doesn't exist
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # 5. Store in Chroma vector DB
-        vectordb = Chroma.from_texts(
-            texts=chunks,
-            embedding=embeddings,
-            persist_directory=persist_directory,
-            collection_name="hackathon_topics"
+        if count == 0:
+            return None
+
+        vectordb = Chroma(
+            client=client,
+            embedding_function=get_embeddings(),
+            collection_name=name
         )
-        
-        # Note: .persist() is deprecated in newer Chroma versions
-        # Data is automatically persisted when persist_directory is specified
-        
-        st.success(f"✅ Vector database created with {len(chunks)} chunks!")
-        
-        # Store path in session state for retrieval
-        st.session_state['vector_db_path'] = persist_directory
-        
+        index = open_topic_index(vectordb, name)
+        if index is None:
+            return None
+        with self._lock:
+            self._entries[name] = [index, count * _BYTES_PER_CHUNK, time.time()]
+            self._entries.move_to_end(name)
+            self._evict()
+        return index
+
+    def discard(self, namespace):
+        with self._lock:
+            self._entries.pop(collection_name_for(namespace), None)
+
+    def loaded_bytes(self):
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def _evict(self):
+        now = time.time()
+        for name in [n for n, e in self._entries.items() if now - e[2] > self.idle_seconds]:
+            del self._entries[name]
+        # Keep the most recently used collection even if it alone exceeds the budget
+        while len(self._entries) > 1 and sum(e[1] for e in self._entries.values()) > self.max_bytes:
+            self._entries.popitem(last=False)
+
+
+@st.cache_resource(show_spinner=False)
+def get_collection_registry():
+    return CollectionRegistry()
+
+
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def _build_lock(name, base_dir=None):
+    """Held while a collection is (re)built; keyed by its directory or shared-store name."""
+    with _build_locks_guard:
+        return _build_locks.setdefault(base_dir or name, threading.Lock())
+
+
+def _is_building(name, base_dir=None):
+    return _build_lock(name, base_dir).locked()
+
+
+def delete_vector_db(namespace):
+    """Removes a tenant's topics collection. Returns True if one existed."""
+    name = collection_name_for(namespace)
+    if _is_building(name):
+        st.warning("⏳ This topics database is being rebuilt. Please wait.")
+        return False
+    return _remove_collection(namespace)
+
+
+def _remove_collection(namespace):
+    name = collection_name_for(namespace)
+    get_collection_registry().discard(namespace)
+    try:
+        os.remove(bm25_path(name))
+    except OSError:
+        pass
+    remove_numpy_index(numpy_dir(), name)
+    try:
+        get_chroma_client().delete_collection(name)
+        return True
+    except Exception:
+        return False
+
+
+def create_vector_db(file_path, namespace=None, persist_directory=None):
+    """
+    Creates a vector database from a DOCX or PDF file using LangChain and Chroma.
+    The document is streamed: paragraphs/pages are chunked incrementally and
+    embedded in batches while the rest of the file is still being extracted.
+    A BM25 index and, for small corpora, a NumPy embedding matrix over the
+    same chunks are written alongside, so each chunk is embedded only once.
+
+    With a namespace, the tenant's collection in the shared store is rebuilt
+    and other tenants are untouched. With persist_directory, a standalone
+    database is written there instead.
+    """
+    if namespace is None and persist_directory is None:
+        st.error("❌ No event/user namespace given for the topics database.")
+        return None
+
+    lock = _build_lock(collection_name_for(namespace) if namespace else None, persist_directory)
+    if not lock.acquire(blocking=False):
+        st.warning("⏳ This topics database is already being rebuilt. Please wait.")
+        return None
+
+    matrix = None
+    try:
+        embeddings = get_embeddings()
+
+        if persist_directory is not None:
+            # FORCE CLEAN START - Delete any existing database
+            if os.path.exists(persist_directory):
+                try:
+                    shutil.rmtree(persist_directory)
+                    time.sleep(0.5)  # Give filesystem time to release
+                except Exception as e:
+                    st.warning(f"Cleaning old DB: {e}")
+            os.makedirs(persist_directory, exist_ok=True)
+            name = DEFAULT_COLLECTION
+            base_dir = persist_directory
+            vectordb = Chroma(
+                persist_directory=persist_directory,
+                embedding_function=embeddings,
+                collection_name=name
+            )
+        else:
+            _remove_collection(namespace)
+            name = collection_name_for(namespace)
+            base_dir = None
+            vectordb = Chroma(
+                client=get_chroma_client(),
+                embedding_function=embeddings,
+                collection_name=name
+            )
+
+        # Stream text -> chunks -> embedding batches into Chroma, BM25 and NumPy
+        lexical = BM25Index()
+        matrix = NumpyIndexWriter(numpy_dir(base_dir), name)
+        progress = st.empty()
+        total_chunks = 0
+        for batch in iter_document_batches(file_path):
+            vectors = embeddings.embed_documents(batch)
+            vectordb._collection.add(
+                ids=[str(uuid.uuid4()) for _ in batch],
+                embeddings=vectors,
+                documents=batch
+            )
+            lexical.add_documents(batch)
+            matrix.add(batch, vectors)
+            total_chunks += len(batch)
+            progress.info(f"📄 Processed {total_chunks} text chunks...")
+        progress.empty()
+
+        if total_chunks == 0:
+            matrix.abort()
+            st.error("❌ No text found in the document.")
+            return None
+
+        lexical.save(bm25_path(name, base_dir))
+        if total_chunks <= NUMPY_MAX_CHUNKS:
+            matrix.close()
+        else:
+            # Large corpora are served by Chroma's HNSW index instead
+            matrix.abort()
+            remove_numpy_index(numpy_dir(base_dir), name)
+        st.success(f"✅ Vector database created with {total_chunks} chunks!")
         return vectordb
-    
+
     except Exception as e:
+        if matrix is not None:
+            matrix.abort()
         st.error(f"❌ Error creating vector database: {str(e)}")
         return None
+    finally:
+        if persist_directory is None:
+            # Drop anything opened before the build so the next query sees the new collection
+            get_collection_registry().discard(namespace)
+        lock.release()
 
 
-def retrieve_relevant_topics(query, persist_directory=None, top_k=5):
-    if persist_directory is None:
-        # Try to get from session state first
-        if 'vector_db_path' in st.session_state:
-            persist_directory = st.session_state['vector_db_path']
-        else:
-            # Fallback to default (won't find anything but won't crash)
-            persist_directory = os.path.join(tempfile.gettempdir(), "chroma_db")
+def _resolve_index(namespace=None, persist_directory=None):
     """
-    Retrieves the most relevant topics from the vector database based on the query.
+    Picks the tenant's TopicIndex, falling back to the prebuilt warm index
+    and then the shipped Chroma index. Returns None if nothing is available.
     """
-    try:
-        # Check if vector database exists
+    if persist_directory is not None:
         if not os.path.exists(persist_directory):
-            return []
-        
-        # Load embeddings model
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        # Load existing vector database
+            return None
         vectordb = Chroma(
             persist_directory=persist_directory,
-            embedding_function=embeddings,
-            collection_name="hackathon_topics"
+            embedding_function=get_embeddings(),
+            collection_name=DEFAULT_COLLECTION
         )
-        
-        # Perform similarity search
-        results = vectordb.similarity_search(query, k=top_k)
-        
+        return open_topic_index(vectordb, DEFAULT_COLLECTION, persist_directory)
+
+    if namespace:
+        index = get_collection_registry().get(namespace)
+        if index is not None:
+            return index
+
+    return get_warm_index() or get_default_index()
+
+
+def retrieve_relevant_topics(query, namespace=None, top_k=5, persist_directory=None):
+    """
+    Retrieves the most relevant topics for the query using hybrid search:
+    vector similarity and BM25 keyword hits, fused by reciprocal rank.
+    Searches the namespace's own collection if it has one, else the default index.
+    """
+    try:
+        index = _resolve_index(namespace, persist_directory)
+        if index is None:
+            return []
+
+        fetch_k = top_k * HYBRID_CANDIDATE_FACTOR
+        query_embedding = get_embeddings().embed_query(query)
+        vector_hits = [text for text, _ in index.backend.search(query_embedding, k=fetch_k)]
+        lexical_hits = [text for text, _ in index.lexical.search(query, k=fetch_k)]
+
         # Extract and return relevant content
-        relevant_topics = [result.page_content for result in results]
-        
+        relevant_topics = reciprocal_rank_fusion([vector_hits, lexical_hits])[:top_k]
+
         return relevant_topics
-    
+
     except Exception as e:
         st.error(f"❌ Error retrieving topics: {str(e)}")
         return []
 
 
-def retrieve_relevant_topics_with_scores(query, persist_directory="vectorstore/chroma_db", top_k=5):
+def retrieve_relevant_topics_with_scores(query, namespace=None, top_k=5, persist_directory=None):
     """
     Retrieves relevant topics along with their similarity scores.
     Useful for debugging or displaying confidence levels.
     """
     try:
-        if not os.path.exists(persist_directory):
+        index = _resolve_index(namespace, persist_directory)
+        if index is None:
             st.warning("⚠️ Vector database not found.")
             return []
-        
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        vectordb = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=embeddings,
-            collection_name="hackathon_topics"
-        )
-        
-        # Get results with scores
-        results_with_scores = vectordb.similarity_search_with_score(query, k=top_k)
-        
+
+        # Get results with similarity scores (higher is more relevant)
+        query_embedding = get_embeddings().embed_query(query)
+        results_with_scores = index.backend.search(query_embedding, k=top_k)
+
         # Format results
         formatted_results = [
             {
-                "content": doc.page_content,
+                "content": text,
                 "score": score
             }
-            for doc, score in results_with_scores
+            for text, score in results_with_scores
         ]
-        
+
         return formatted_results
-    
+
     except Exception as e:
         st.error(f"❌ Error retrieving topics with scores: {str(e)}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,262 @@
+"""
+Admission control for upstream LLM calls.
+
+One process-wide scheduler sits in front of every chat completion:
+- at most LLM_MAX_CONCURRENCY requests are in flight at once,
+- a token bucket keeps estimated usage under LLM_TOKENS_PER_MINUTE,
+- waiting requests are served round-robin per user, so one user's burst
+  can't starve everyone else; admins skip the queue,
+- when more than LLM_MAX_QUEUE requests are waiting, new ones are shed
+  with SchedulerOverloaded instead of piling up until they time out.
+
+The caller's identity and an optional queue-position callback travel in
+context variables, set once per Streamlit script run (see set_caller).
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import threading
+import time
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+# 0 disables token budgeting
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "30000"))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "50"))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "90"))
+
+# Completion budget assumed when a call doesn't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+_caller = ContextVar("llm_caller", default=("anonymous", False))
+_queue_callback = ContextVar("llm_queue_callback", default=None)
+
+
+class SchedulerOverloaded(RuntimeError):
+    """Raised when a request is shed instead of queued."""
+
+
+def set_caller(user, is_admin=False):
+    """Attributes LLM calls made from the current thread/context to user."""
+    _caller.set((user or "anonymous", bool(is_admin)))
+
+
+def get_caller():
+    return _caller.get()
+
+
+@contextmanager
+def queue_feedback(callback):
+    """
+    Calls callback(position) while a request in this block waits for a
+    slot (1 = next in line) and callback(0) once it is admitted.
+    """
+    token = _queue_callback.set(callback)
+    try:
+        yield
+    finally:
+        _queue_callback.reset(token)
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Rough prompt size (~4 chars per token) plus the completion budget."""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class _Ticket:
+    __slots__ = ("user", "is_admin", "tokens", "granted", "used_tokens")
+
+    def __init__(self, user, is_admin, tokens):
+        self.user = user
+        self.is_admin = is_admin
+        self.tokens = tokens
+        self.granted = False
+        self.used_tokens = None  # set by the caller from response.usage
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_queue=LLM_MAX_QUEUE, queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._admin_queue = deque()
+        self._user_queues = OrderedDict()  # user -> deque of tickets; order is the round-robin ring
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self.shed = 0
+
+    # --- bookkeeping (all called with self._cond held) ---
+
+    def _refill(self):
+        if self.tokens_per_minute <= 0:
+            return
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60.0
+        )
+        self._refilled_at = now
+
+    def _waiting(self):
+        return len(self._admin_queue) + sum(len(q) for q in self._user_queues.values())
+
+    def _head(self):
+        if self._admin_queue:
+            return self._admin_queue[0]
+        for queue in self._user_queues.values():
+            return queue[0]
+        return None
+
+    def _affordable(self, ticket):
+        if self.tokens_per_minute <= 0:
+            return True
+        # A request larger than the whole budget waits for a full bucket rather than forever
+        return self._tokens >= min(ticket.tokens, self.tokens_per_minute)
+
+    def _dispatch(self):
+        """Admits waiting tickets in fair order while slots and budget allow."""
+        self._refill()
+        admitted = False
+        while self._active < self.max_concurrency:
+            ticket = self._head()
+            if ticket is None or not self._affordable(ticket):
+                break
+            if ticket.is_admin:
+                self._admin_queue.popleft()
+            else:
+                # Rotate: the user's next request goes to the back of the ring
+                queue = self._user_queues.pop(ticket.user)
+                queue.popleft()
+                if queue:
+                    self._user_queues[ticket.user] = queue
+            ticket.granted = True
+            self._active += 1
+            self._tokens -= ticket.tokens
+            admitted = True
+        if admitted:
+            self._cond.notify_all()
+
+    def _position(self, ticket):
+        """1-based place in line under round-robin order."""
+        if ticket.is_admin:
+            return self._admin_queue.index(ticket) + 1
+        ahead = len(self._admin_queue)
+        own = self._user_queues.get(ticket.user, ())
+        index = own.index(ticket) if ticket in own else 0
+        before_user = True
+        for user, queue in self._user_queues.items():
+            if user == ticket.user:
+                before_user = False
+                ahead += index
+                continue
+            ahead += min(len(queue), index + 1 if before_user else index)
+        return ahead + 1
+
+    # --- public API ---
+
+    def acquire(self, tokens, user="anonymous", is_admin=False, on_queue=None):
+        ticket = _Ticket(user, is_admin, tokens)
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            if not is_admin and self._waiting() >= self.max_queue:
+                self.shed += 1
+                raise SchedulerOverloaded(
+                    f"The AI service is at capacity right now ({self._waiting()} requests waiting). "
+                    "Please try again in a minute."
+                )
+            if is_admin:
+                self._admin_queue.append(ticket)
+            else:
+                self._user_queues.setdefault(user, deque()).append(ticket)
+            self._dispatch()
+
+        last_position = None
+        try:
+            while True:
+                with self._cond:
+                    if ticket.granted:
+                        break
+                    position = self._position(ticket)
+                    if not on_queue or position == last_position:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.shed += 1
+                            raise SchedulerOverloaded(
+                                f"Waited {self.queue_timeout:.0f}s for the AI service without getting a slot. "
+                                "Please try again in a minute."
+                            )
+                        # Wake periodically so token refills are noticed without a release
+                        self._cond.wait(min(remaining, 0.5))
+                        self._dispatch()
+                        continue
+                # Report the new position outside the lock: the callback draws on a
+                # session's page and must not hold up every other session's admission
+                on_queue(position)
+                last_position = position
+            if on_queue and last_position is not None:
+                on_queue(0)
+        except BaseException:
+            # Timed out, or the script run was stopped mid-wait or while clearing
+            # the queue notice: never leak the ticket or its slot
+            with self._cond:
+                if ticket.granted:
+                    self._active -= 1
+                    if self.tokens_per_minute > 0:
+                        self._tokens = min(float(self.tokens_per_minute), self._tokens + ticket.tokens)
+                    self._dispatch()
+                    self._cond.notify_all()
+                else:
+                    self._remove(ticket)
+            raise
+        return ticket
+
+    def _remove(self, ticket):
+        if ticket.is_admin:
+            self._admin_queue.remove(ticket)
+            return
+        queue = self._user_queues[ticket.user]
+        queue.remove(ticket)
+        if not queue:
+            del self._user_queues[ticket.user]
+
+    def release(self, ticket):
+        with self._cond:
+            self._active -= 1
+            if ticket.used_tokens is not None and self.tokens_per_minute > 0:
+                # Refund the over-estimate (or charge the overrun) once real usage is known
+                self._tokens = min(float(self.tokens_per_minute), self._tokens + ticket.tokens - ticket.used_tokens)
+            self._dispatch()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens):
+        """Holds one admitted slot for the current caller for the duration of the block."""
+        user, is_admin = get_caller()
+        ticket = self.acquire(tokens, user=user, is_admin=is_admin, on_queue=_queue_callback.get())
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._cond:
+            self._refill()
+            return {
+                "active": self._active,
+                "waiting": self._waiting(),
+                "tokens_available": int(self._tokens) if self.tokens_per_minute > 0 else None,
+                "shed": self.shed,
+            }
+
+
+_scheduler = LLMScheduler()
+
+
+def get_scheduler():
+    return _scheduler
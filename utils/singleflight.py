@@ -0,0 +1,81 @@
+"""
+Single-flight request coalescing.
+
+When many Streamlit sessions fire the identical upstream request at the
+same moment (a class pasting the same description), only the first caller
+goes upstream; every concurrent caller with the same fingerprint waits for
+and shares that result or exception.
+"""
+import hashlib
+import json
+import threading
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A waiter gave up before the in-flight call finished."""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serialisable request parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key. Thread-safe, so it works
+    across Streamlit's per-session script threads.
+
+    - The first caller (leader) runs fn; its result is returned to everyone
+      who joined while it was in flight.
+    - If fn raises, the same exception is raised in the leader and all waiters.
+    - Waiters stop waiting after `timeout` seconds with SingleFlightTimeout;
+      the leader's call carries on and later callers start a fresh flight.
+    - Nothing is cached: once the call finishes the key is forgotten.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0  # total waiters served by someone else's call
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for an identical in-flight request")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
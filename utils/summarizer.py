@@ -1,48 +1,152 @@
-import streamlit as st
-from openai import OpenAI
+from utils.llm import chat_completion, get_api_key
+from utils.scheduler import SchedulerOverloaded, queue_feedback
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache
+import logging
 import os
 
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+logger = logging.getLogger(__name__)
 
-def summarize_text(text):
-    """
-    Summarizes the hackathon/competition description using OpenAI's latest API.
-    """
-    if not text or len(text.strip()) == 0:
-        return "⚠️ Please provide a hackathon description to summarize."
-    
+SUMMARY_MODEL = "gpt-4o"
+MAP_MODEL = "gpt-4o-mini"
+# Inputs up to this many tokens are summarized in one call
+SINGLE_CALL_MAX_TOKENS = int(os.environ.get("SUMMARY_SINGLE_CALL_TOKENS", "3000"))
+MAP_CHUNK_TOKENS = 2000
+MAP_CHUNK_OVERLAP = 100
+MAP_CONCURRENCY = int(os.environ.get("SUMMARY_MAP_CONCURRENCY", "4"))
+MAP_MAX_TOKENS = 250
+# Longest reduce prompt before partial summaries are themselves map-reduced
+REDUCE_MAX_TOKENS = 6000
+
+SYSTEM_PROMPT = "You are an expert at analyzing and summarizing hackathon and competition descriptions concisely."
+
+
+@lru_cache(maxsize=1)
+def _encoding():
     try:
-        prompt = f"Summarize this competition or hackathon text briefly in 3-4 lines:\n\n{text}"
-        
-        # Initialize Client
-        try:
-            api_key = st.secrets["openai_api_key"]
-        except:
-            api_key = os.environ.get("OPENAI_API_KEY")
-
-        if not api_key:
-            return "⚠️ OpenAI API Key is missing. Please set it in Streamlit Secrets."
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken missing, or its vocabulary can't be downloaded: estimate instead
+        return None
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_for_map(text, chunk_tokens=MAP_CHUNK_TOKENS):
+    """Splits on paragraph/sentence boundaries into chunks of about chunk_tokens tokens."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=MAP_CHUNK_OVERLAP,
+        length_function=count_tokens,
+    )
+    return splitter.split_text(text)
 
-        client = OpenAI(api_key=api_key)
 
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",  # Use "gpt-4o-mini" for faster/cheaper responses
+def _summarize_once(text):
+    prompt = f"Summarize this competition or hackathon text briefly in 3-4 lines:\n\n{text}"
+    response = chat_completion(
+        stage="summarize",
+        model=SUMMARY_MODEL,  # Use "gpt-4o-mini" for faster/cheaper responses
+        messages=[
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=0.5,  # Lower temperature for more focused summaries
+        max_tokens=200
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _summarize_chunk(chunk, index, total):
+    # Map workers can't draw on the page, so no queue-position callback here
+    with queue_feedback(None):
+        response = chat_completion(
+            stage="summarize_map",
+            model=MAP_MODEL,
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an expert at analyzing and summarizing hackathon and competition descriptions concisely."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
-                    "content": prompt
+                    "content": (
+                        f"This is part {index + 1} of {total} of a long competition or hackathon description. "
+                        "List its key facts: theme, tracks, challenges, judging criteria, constraints, prizes and dates. "
+                        f"Be brief and omit anything not in this part.\n\n{chunk}"
+                    )
                 }
             ],
-            temperature=0.5,  # Lower temperature for more focused summaries
-            max_tokens=200
+            temperature=0.3,
+            max_tokens=MAP_MAX_TOKENS
         )
-        
-        return response.choices[0].message.content.strip()
-    
+    return response.choices[0].message.content.strip()
+
+
+def _map(chunks):
+    """Summarizes chunks concurrently, keeping the caller's identity for scheduling and usage."""
+    with ThreadPoolExecutor(max_workers=min(MAP_CONCURRENCY, len(chunks))) as pool:
+        futures = [
+            pool.submit(copy_context().run, _summarize_chunk, chunk, i, len(chunks))
+            for i, chunk in enumerate(chunks)
+        ]
+        return [future.result() for future in futures]
+
+
+def _map_reduce(text, depth=0):
+    chunks = split_for_map(text)
+    logger.info("Map step: %d chunks with %s (depth %d)", len(chunks), MAP_MODEL, depth)
+    partials = _map(chunks)
+    combined = "\n\n".join(f"Part {i + 1}:\n{p}" for i, p in enumerate(partials))
+
+    # Very long inputs: collapse the partial summaries again before the final call
+    if count_tokens(combined) > REDUCE_MAX_TOKENS and depth < 2:
+        logger.info("Summary partials still %d tokens; collapsing again", count_tokens(combined))
+        return _map_reduce(combined, depth + 1)
+
+    return _summarize_once(
+        "The following are notes on consecutive parts of one long description. "
+        f"Summarize the whole competition from them.\n\n{combined}"
+    )
+
+
+def summarize_text(text):
+    """
+    Summarizes the hackathon/competition description using OpenAI's latest API.
+    Long descriptions are split, summarized in parallel by a cheaper model and
+    then reduced into the final 3-4 line summary.
+    """
+    if not text or len(text.strip()) == 0:
+        return "⚠️ Please provide a hackathon description to summarize."
+
+    try:
+        if not get_api_key():
+            return "⚠️ OpenAI API Key is missing. Please set it in Streamlit Secrets."
+
+        tokens = count_tokens(text)
+        if tokens <= SINGLE_CALL_MAX_TOKENS:
+            logger.info("Summarizing %d tokens in a single call", tokens)
+            return _summarize_once(text)
+
+        logger.info("Summarizing %d tokens with map-reduce", tokens)
+        return _map_reduce(text)
+
+    except SchedulerOverloaded as e:
+        return f"⚠️ {str(e)}"
     except Exception as e:
-        return f"❌ Error during summarization: {str(e)}"
\ No newline at end of file
+        return f"❌ Error during summarization: {str(e)}"
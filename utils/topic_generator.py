@@ -1,6 +1,7 @@
-import streamlit as st
-from openai import OpenAI
-import os
+import re
+
+from utils.llm import chat_completion, get_api_key
+from utils.scheduler import SchedulerOverloaded
 
 
 
@@ -10,17 +11,9 @@ def generate_hackathon_ideas(summary, retrieved_topics, repo_results):
     Forces output in markdown table format.
     """
     try:
-        # Initialize Client
-        try:
-            api_key = st.secrets["openai_api_key"]
-        except:
-            api_key = os.environ.get("OPENAI_API_KEY")
-
-        if not api_key:
+        if not get_api_key():
             return "⚠️ OpenAI API Key is missing. Please set it in Streamlit Secrets."
 
-        client = OpenAI(api_key=api_key)
-
         # Format retrieved topics
         if isinstance(retrieved_topics, list):
             topics_text = "\n".join([f"- {topic}" for topic in retrieved_topics])
@@ -73,7 +66,8 @@ Context:
 """
 
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            stage="ideas",
             model="gpt-4o",  # Use "gpt-4o-mini" for cost savings
             messages=[
                 {
@@ -91,6 +85,8 @@ Context:
         
         return response.choices[0].message.content.strip()
     
+    except SchedulerOverloaded as e:
+        return f"⚠️ {str(e)}"
     except Exception as e:
         return f"❌ Error generating hackathon ideas: {str(e)}"
 
@@ -133,7 +129,8 @@ Format each idea as:
 ---
 """
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            stage="ideas_structured",
             model="gpt-4o-mini",  # More cost-effective for structured output
             messages=[
                 {
@@ -151,5 +148,35 @@ Format each idea as:
         
         return response.choices[0].message.content.strip()
     
+    except SchedulerOverloaded as e:
+        return f"⚠️ {str(e)}"
     except Exception as e:
-        return f"❌ Error generating structured ideas: {str(e)}"
\ No newline at end of file
+        return f"❌ Error generating structured ideas: {str(e)}"
+
+
+def parse_ideas(ideas, limit=5):
+    """
+    Parses the markdown table from generate_hackathon_ideas into a list of
+    {title, summary, tech_stack} dicts, falling back to numbered/heading titles.
+    """
+    parsed_ideas = []
+    for line in ideas.split('\n'):
+        if '|' in line and not line.strip().startswith('|---'):
+            cells = [c.strip() for c in line.split('|') if c.strip()]
+            if cells and cells[0].lower() not in ['title', 'summary', 'tech stack', 'example repo', 'novelty']:
+                # Simple 3-column check
+                if len(cells) >= 2:
+                    parsed_ideas.append({
+                        'title': cells[0],
+                        'summary': cells[1] if len(cells) > 1 else '',
+                        'tech_stack': cells[2] if len(cells) > 2 else '',
+                    })
+
+    # Fallback parsing
+    if not parsed_ideas:
+        title_pattern = r'(?:\d+\.\s*\*\*|###?\s*)([^:\n]+)'
+        titles = re.findall(title_pattern, ideas)
+        for title in titles[:limit]:
+            parsed_ideas.append({'title': title.strip('*').strip(), 'summary': '', 'tech_stack': ''})
+
+    return parsed_ideas[:limit]
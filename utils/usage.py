@@ -0,0 +1,159 @@
+"""
+Per-request token and latency accounting.
+
+record_usage() only appends to an in-memory buffer; a background thread
+writes the buffer to the `usage` table in one transaction every few
+seconds, so the request path never waits on SQLite.
+"""
+import atexit
+from collections import deque
+import os
+import sqlite3
+import threading
+import time
+
+from utils.db import get_db_connection, init_db
+
+USAGE_FLUSH_SECONDS = float(os.environ.get("USAGE_FLUSH_SECONDS", "2"))
+USAGE_FLUSH_BATCH = 200
+# Rows kept in memory if the database stays locked; oldest are dropped first
+USAGE_BUFFER_MAX = 10000
+
+# USD per 1M tokens (input, output), for cost estimates in the admin view
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+_buffer = deque(maxlen=USAGE_BUFFER_MAX)
+_lock = threading.Lock()
+_wake = threading.Event()
+_flusher = None
+
+init_db()
+
+
+def record_usage(stage, model=None, prompt_tokens=0, completion_tokens=0, latency=0.0,
+                 cache_hit=False, user=None):
+    """Queues one usage row. latency is in seconds; user defaults to the current LLM caller."""
+    if user is None:
+        from utils.scheduler import get_caller
+        user = get_caller()[0]
+    row = (time.time(), user, stage, model, int(prompt_tokens or 0), int(completion_tokens or 0),
+           round(latency * 1000, 1), int(bool(cache_hit)))
+    with _lock:
+        _buffer.append(row)
+        pending = len(_buffer)
+    _ensure_flusher()
+    if pending >= USAGE_FLUSH_BATCH:
+        _wake.set()
+
+
+def record_completion(stage, model, response, latency):
+    """Records an upstream chat completion from its response.usage."""
+    usage = getattr(response, "usage", None)
+    record_usage(
+        stage, model=getattr(response, "model", None) or model,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0),
+        completion_tokens=getattr(usage, "completion_tokens", 0),
+        latency=latency
+    )
+
+
+def flush_usage():
+    """Writes buffered rows to SQLite. Rows are put back if the write fails."""
+    with _lock:
+        rows = list(_buffer)
+        _buffer.clear()
+    if not rows:
+        return 0
+    try:
+        conn = get_db_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO usage (ts, username, stage, model, prompt_tokens, completion_tokens, latency_ms, cache_hit) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        with _lock:
+            _buffer.extendleft(reversed(rows))
+        return 0
+    return len(rows)
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(USAGE_FLUSH_SECONDS)
+        _wake.clear()
+        flush_usage()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="usage-flush", daemon=True)
+            _flusher.start()
+            atexit.register(flush_usage)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost, or None for models without a price entry."""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            input_price, output_price = MODEL_PRICES[name]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return None
+
+
+def usage_summary(since=None, group_by="stage"):
+    """
+    Aggregates usage rows since the given unix time, grouped by
+    'stage' (stage + model) or 'user'. Flushes pending rows first.
+    """
+    flush_usage()
+    columns = "stage, model" if group_by == "stage" else "username"
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT {columns},
+                   COUNT(*) AS requests,
+                   SUM(cache_hit) AS cache_hits,
+                   SUM(prompt_tokens) AS prompt_tokens,
+                   SUM(completion_tokens) AS completion_tokens,
+                   AVG(CASE WHEN cache_hit = 0 THEN latency_ms END) AS avg_latency_ms,
+                   MAX(latency_ms) AS max_latency_ms
+            FROM usage
+            WHERE ts >= ?
+            GROUP BY {columns}
+            ORDER BY prompt_tokens + completion_tokens DESC
+        """, (since or 0,)).fetchall()
+        cost_rows = conn.execute(f"""
+            SELECT {columns}, model AS priced_model,
+                   SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens
+            FROM usage WHERE ts >= ? GROUP BY {columns}, priced_model
+        """, (since or 0,)).fetchall()
+    finally:
+        conn.close()
+
+    costs = {}
+    for row in cost_rows:
+        key = (row["stage"], row["model"]) if group_by == "stage" else row["username"]
+        cost = estimate_cost(row["priced_model"], row["prompt_tokens"], row["completion_tokens"])
+        if cost is not None:
+            costs[key] = costs.get(key, 0.0) + cost
+
+    summary = []
+    for row in rows:
+        item = dict(row)
+        key = (row["stage"], row["model"]) if group_by == "stage" else row["username"]
+        item["avg_latency_ms"] = round(item["avg_latency_ms"] or 0.0, 1)
+        item["est_cost_usd"] = round(costs.get(key, 0.0), 4)
+        summary.append(item)
+    return summary
@@ -0,0 +1,140 @@
+"""
+Prebuilt, read-only topics index ("warm index").
+
+scripts/build_index.py embeds data/topics.docx offline and writes a
+versioned artifact; a fresh instance opens it with no embedding work:
+
+    <WARM_INDEX_DIR>/manifest.json          version, source and model info, file checksums
+    <WARM_INDEX_DIR>/numpy/<name>.*          NumPy backend sidecars (memory-mapped)
+    <WARM_INDEX_DIR>/bm25/<name>.json        BM25 index
+
+The manifest is written last, so a directory without one is incomplete.
+"""
+import json
+import logging
+import os
+import time
+
+from utils.backends import NumpyBackend
+from utils.embeddings import EMBEDDING_DIM, MODEL_NAME
+from utils.ingest import file_sha256
+from utils.lexical import BM25Index
+
+logger = logging.getLogger(__name__)
+
+WARM_INDEX_DIR = os.environ.get("WARM_INDEX_DIR", "vectorstore/warm_index")
+# Checksums are verified on load unless disabled
+WARM_INDEX_VERIFY = os.environ.get("WARM_INDEX_VERIFY", "1") not in ("0", "false", "False")
+WARM_INDEX_SOURCE = "data/topics.docx"
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "hackathon_topics"
+
+
+class WarmIndexError(Exception):
+    """The warm index exists but can't be used (corrupt, incomplete or incompatible)."""
+
+
+def numpy_dir(directory):
+    return os.path.join(directory, "numpy")
+
+
+def bm25_path(directory):
+    return os.path.join(directory, "bm25", f"{INDEX_NAME}.json")
+
+
+def file_checksums(directory):
+    """{relative path: {sha256, bytes}} for every file in the artifact except the manifest."""
+    checksums = {}
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            rel = os.path.relpath(path, directory).replace(os.sep, "/")
+            if rel == MANIFEST_NAME:
+                continue
+            checksums[rel] = {"sha256": file_sha256(path), "bytes": os.path.getsize(path)}
+    return checksums
+
+
+def write_manifest(directory, count, dtype, source, embedding_backend, chunking=None):
+    """
+    Checksums the artifact and writes its manifest. Returns the manifest dict.
+    `source` is the file the vectors came from ({path, sha256}); `chunking` is
+    recorded only when this build chunked that file itself.
+    """
+    created = time.time()
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "index_version": f"{time.strftime('%Y%m%d%H%M%S', time.gmtime(created))}-{source['sha256'][:12]}",
+        "created_at": created,
+        "name": INDEX_NAME,
+        "count": count,
+        "dtype": dtype,
+        "source": source,
+        "embedding": {"model": MODEL_NAME, "dim": EMBEDDING_DIM, "backend": embedding_backend},
+        "files": file_checksums(directory),
+    }
+    if chunking is not None:
+        manifest["chunking"] = chunking
+    tmp_path = os.path.join(directory, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+def read_manifest(directory=WARM_INDEX_DIR):
+    """The artifact's manifest, or None if there is no complete artifact."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise WarmIndexError(f"Unreadable manifest {path}: {e}")
+
+
+def verify_warm_index(directory, manifest, checksums=True):
+    """Raises WarmIndexError if the artifact doesn't match its manifest or this app's embedder."""
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise WarmIndexError(f"Format version {manifest.get('format_version')} is not supported (expected {FORMAT_VERSION})")
+    embedding = manifest.get("embedding", {})
+    if embedding.get("model") != MODEL_NAME or embedding.get("dim") != EMBEDDING_DIM:
+        raise WarmIndexError(f"Built with {embedding.get('model')} ({embedding.get('dim')}d); this app embeds queries with {MODEL_NAME}")
+
+    for rel, expected in manifest.get("files", {}).items():
+        path = os.path.join(directory, rel)
+        if not os.path.exists(path):
+            raise WarmIndexError(f"Missing file {rel}")
+        if os.path.getsize(path) != expected["bytes"]:
+            raise WarmIndexError(f"Size mismatch for {rel}")
+        if checksums and file_sha256(path) != expected["sha256"]:
+            raise WarmIndexError(f"Checksum mismatch for {rel}")
+
+
+def load_warm_index(directory=WARM_INDEX_DIR, verify=WARM_INDEX_VERIFY):
+    """
+    Opens the artifact read-only: sidecars are memory-mapped, BM25 is loaded.
+    Returns (backend, lexical, manifest), or None if no artifact is present.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    verify_warm_index(directory, manifest, checksums=verify)
+
+    backend = NumpyBackend.load(numpy_dir(directory), INDEX_NAME)
+    if backend is None:
+        raise WarmIndexError("NumPy sidecars are missing")
+    lexical = BM25Index.load(bm25_path(directory))
+    if len(backend) != manifest["count"] or len(lexical) != manifest["count"]:
+        raise WarmIndexError(f"Expected {manifest['count']} chunks, found {len(backend)} vectors / {len(lexical)} texts")
+
+    source = manifest.get("source", {})
+    if source.get("path") and os.path.exists(source["path"]) and file_sha256(source["path"]) != source.get("sha256"):
+        logger.warning("Warm index %s is older than %s; rebuild with `python -m scripts.build_index`.",
+                       manifest["index_version"], source["path"])
+
+    logger.info("Loaded warm index %s (%d chunks)", manifest["index_version"], manifest["count"])
+    return backend, lexical, manifest